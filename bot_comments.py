@@ -45,7 +45,8 @@ PING_USER_ID = os.getenv("PING_USER_ID", "603578473814032414").strip()
 # ─── STATE ─────────────────────────────────────────────────────────────────────
 def load_state():
     try:
-        return json.load(open(STATE_FILE, encoding="utf-8"))
+        with open(STATE_FILE, "rb") as f:
+            return json.loads(f.read())
     except (FileNotFoundError, json.JSONDecodeError):
         initial = {
             "free_last_guid": None,
@@ -53,12 +54,12 @@ def load_state():
             "comments_last_guid": None
         }
         with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(initial, f, indent=2, ensure_ascii=False)
+            json.dump(initial, f, separators=(",", ":"), ensure_ascii=False)
         return initial
 
 def save_state(state):
     with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, ensure_ascii=False)
+        json.dump(state, f, separators=(",", ":"), ensure_ascii=False)
 
 
 # ─── THREAD HELPERS ────────────────────────────────────────────────────────────
@@ -2,101 +2,56 @@
 from discord.errors import Forbidden, HTTPException, NotFound
 import os
 import re
-import json
 import asyncio
+import functools
 from datetime import datetime, timezone
 import feedparser
 from dateutil import parser as dateparser
 
 import discord
-from discord import Embed
-from discord.ui import View, Button
+from discord.http import Route
 
 from novel_mappings import HOSTING_SITE_DATA
 
+from chapters_common import (
+    STATE_FILE,
+    load_state,
+    save_state,
+    ensure_thread_ready,
+    norm,
+    entry_guid,
+    is_mistmint,
+    thread_id_for,
+)
+
 # ─── CONFIG (no fallback channel) ──────────────────────────────────────────────
 TOKEN      = os.environ["DISCORD_BOT_TOKEN"]
-STATE_FILE = "state_rss.json"
 FEED_KEY   = "paid_last_guid"
 RSS_URL    = "https://raw.githubusercontent.com/Cannibal-Turtle/rss-feed/main/paid_chapters_feed.xml"
 
-HOST_NAME_TARGET = "Mistmint Haven"  # only post items from this host
-NSFW_ROLE        = "<@&1402533039497805894>"
-# ───────────────────────────────────────────────────────────────────────────────
-
-AUTO_ARCHIVE_ALLOWED = {60, 1440, 4320, 10080}
+NSFW_ROLE  = "<@&1402533039497805894>"
 
-# Turn on later (e.g., set env USE_UNARCHIVE=1) when the bot has Manage Threads
-USE_UNARCHIVE = os.getenv("USE_UNARCHIVE", "0") == "1"
-
-async def ensure_unarchived(thread: discord.Thread, *, unlock: bool = True, auto_archive_minutes: int = 10080) -> bool:
-    """
-    Make sure the thread is unarchived (and optionally unlocked) before sending.
-    Requires the bot to have 'Manage Threads'. Falls back gracefully if the
-    guild doesn't allow 7-day auto archive.
-    """
-    if not isinstance(thread, discord.Thread):
-        return True
+# Message/embed pieces that never change between entries
+HEADER_LINE   = "<a:Crown:1365575414550106154> 𝒫𝓇𝑒𝓂𝒾𝓊𝓂 𝒞𝒽𝒶𝓅𝓉𝑒𝓇 <a:TurtleDance:1365253970435510293>"
+_TITLE_PREFIX = "<a:moonandstars:1365569468629123184>**"
+DUSTY_ROSE    = 0xA87676
+# ───────────────────────────────────────────────────────────────────────────────
 
-    # Pick a valid auto-archive duration the guild supports (best-effort)
-    duration = min(AUTO_ARCHIVE_ALLOWED, key=lambda v: abs(v - auto_archive_minutes))
+_GUID_PREFIX_RE = re.compile(r"([a-z0-9_]+)-", re.I)
 
-    try:
-        # First try: unarchive directly
-        await thread.edit(
-            archived=False,
-            locked=(not unlock),
-            auto_archive_duration=duration
-        )
-        return True
-    except Forbidden:
-        # If we can’t edit (missing perms or not a member), try joining then edit again
-        try:
-            await thread.join()
-        except Exception:
-            pass
-        try:
-            await thread.edit(
-                archived=False,
-                locked=(not unlock),
-                auto_archive_duration=duration
-            )
-            return True
-        except Exception as e:
-            print(f"⚠️ Could not unarchive thread {thread.id}: {e}")
-            return False
-    except HTTPException as e:
-        # Some servers don’t allow 10080; retry without changing duration
-        if e.status == 400:
-            try:
-                await thread.edit(archived=False, locked=(not unlock))
-                return True
-            except Exception as e2:
-                print(f"⚠️ Unarchive retry (no duration) failed for {thread.id}: {e2}")
-                return False
-        print(f"⚠️ HTTPException unarchiving {thread.id}: {e}")
-        return False
-    except Exception as e:
-        print(f"⚠️ Unexpected error unarchiving {thread.id}: {e}")
-        return False
-
-
-async def ensure_thread_ready(thread_or_channel) -> bool:
-    """
-    If it's a Thread: join it (idempotent). Only attempt unarchive when
-    USE_UNARCHIVE=1 (i.e., when the bot has Manage Threads).
-    """
-    if isinstance(thread_or_channel, discord.Thread):
-        try:
-            await thread_or_channel.join()  # safe to call repeatedly
-        except Exception:
-            pass
-        if USE_UNARCHIVE:
-            return await ensure_unarchived(
-                thread_or_channel, unlock=True, auto_archive_minutes=10080
-            )
-        return True
-    return True
+@functools.lru_cache(maxsize=256)
+def _mapped_short_code(host: str, title: str) -> str:
+    """Mapping short_code for (host, title), case-insensitive on title. Cached per series."""
+    novels  = (HOSTING_SITE_DATA.get(host, {}) or {}).get("novels", {}) or {}
+    details = novels.get(title)
+    if not details:
+        folded = title.casefold()
+        for k, v in novels.items():
+            if k.casefold() == folded:
+                details = v
+                break
+    sc = (details or {}).get("short_code")
+    return str(sc).strip().upper() if sc else ""
 
 def find_short_code_for_entry(entry):
     # helper to fetch the first present key, case-insensitive
@@ -114,17 +69,9 @@ def find_short_code_for_entry(entry):
     title = (first("title") or "").strip()
 
     # 1) Mapping-first (case-insensitive title match)
-    novels  = (HOSTING_SITE_DATA.get(host, {}) or {}).get("novels", {}) or {}
-    details = novels.get(title)
-    if not details:
-        for k, v in novels.items():
-            if k.casefold() == title.casefold():
-                details = v
-                break
-
-    sc = (details or {}).get("short_code")
+    sc = _mapped_short_code(host, title)
     if sc:
-        return str(sc).strip().upper()
+        return sc
 
     # 2) Feed-provided short_code
     sc = (first("short_code", "shortcode", "shortCode", "short") or "").strip()
@@ -133,35 +80,13 @@ def find_short_code_for_entry(entry):
 
     # 3) Parse from GUID like "tdlbkgc-1"
     gid = (first("guid", "id") or "").strip()
-    m = re.match(r"([a-z0-9_]+)-", gid, re.I)
+    m = _GUID_PREFIX_RE.match(gid)
     if m:
         return m.group(1).upper()
 
     # 4) Give up
     return ""
 
-def load_state():
-    try:
-        return json.load(open(STATE_FILE, encoding="utf-8"))
-    except (FileNotFoundError, json.JSONDecodeError):
-        initial = {"free_last_guid": None, "paid_last_guid": None, "comments_last_guid": None}
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(initial, f, indent=2, ensure_ascii=False)
-        return initial
-
-
-def save_state(state):
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, ensure_ascii=False)
-
-
-def _norm(s): return (s or "").strip()
-def _guid(e): return _norm(e.get("guid") or e.get("id")) or None
-
-def _is_mistmint(e):
-    host = _norm(e.get("host") or e.get("Host") or e.get("HOST"))
-    return host.lower() == HOST_NAME_TARGET.lower()
-
 def _is_nsfw(entry) -> bool:
     cat = (entry.get("category") or entry.get("Category") or "").strip().upper()
     return cat == "NSFW"
@@ -169,26 +94,20 @@ def _is_nsfw(entry) -> bool:
 def _short_code(e):
     for k in ("short_code", "shortcode", "shortCode", "short"):
         v = e.get(k)
-        if v: return _norm(v)
+        if v: return norm(v)
     meta = e.get("meta") or {}
     v = meta.get("short_code") or meta.get("shortcode") or meta.get("shortCode")
-    return _norm(v) if v else None
-
-def _thread_id_for(short_code):
-    if not short_code: return None
-    env_key = re.sub(r"[^A-Z0-9]+", "_", short_code.upper()) + "_THREAD_ID"
-    val = os.getenv(env_key)
-    try:
-        return int(val) if val else None
-    except ValueError:
-        return None
-
+    return norm(v) if v else None
 
 # ── Paid coin button helpers ───────────────────────────────────────────────────
+_CUSTOM_EMOJI_RE = re.compile(r"^<(?P<anim>a?):(?P<name>[A-Za-z0-9_]+):(?P<id>\d+)>$")
+# Optional custom emoji + optional number, e.g. "<:coin:123> 5" — emoji parts captured in one pass
+_COIN_RE = re.compile(r"^(?:<(?P<anim>a?):(?P<ename>[A-Za-z0-9_]+):(?P<eid>\d+)>)?\s*(?P<num>\d+)?")
+
 def parse_custom_emoji(e: str):
     if not e: return None
     s = e.strip()
-    m = re.match(r"^<(?P<anim>a?):(?P<name>[A-Za-z0-9_]+):(?P<id>\d+)>$", s)
+    m = _CUSTOM_EMOJI_RE.match(s)
     if m:
         return discord.PartialEmoji(
             name=m.group("name"),
@@ -200,10 +119,10 @@ def parse_custom_emoji(e: str):
     return None
 
 
-def get_coin_button_parts(host: str, novel_title: str, fallback_price: str, fallback_emoji: str = None):
+def get_coin_button_parts(host_block: dict, novel_title: str, fallback_price: str, fallback_emoji: str = None):
+    """host_block is the pre-resolved HOSTING_SITE_DATA[host] dict (see on_ready)."""
     label_text, emoji_obj = "", None
     try:
-        host_block = HOSTING_SITE_DATA.get(host, {})
         novels     = host_block.get("novels", {})
         details    = novels.get(novel_title, {})
         mapped_price = details.get("coin_price")
@@ -215,18 +134,43 @@ def get_coin_button_parts(host: str, novel_title: str, fallback_price: str, fall
         pass
 
     coin_text = (fallback_price or "").strip()
-    if coin_text:
-        m = re.match(r"^(?P<emoji><a?:[A-Za-z0-9_]+:\d+>)?\s*(?P<num>\d+)?", coin_text)
-        if m:
-            if not emoji_obj:
-                emoji_obj = parse_custom_emoji((m.group("emoji") or "").strip())
+    if coin_text and not (label_text and emoji_obj):
+        if coin_text.isdecimal():
+            # Plain "5" (the usual feed value): nothing for the regex to find but the number
             if not label_text:
-                num = (m.group("num") or "").strip()
-                if num: label_text = num
+                label_text = coin_text
+        else:
+            m = _COIN_RE.match(coin_text)
+            if m:
+                if not emoji_obj and m.group("eid"):
+                    emoji_obj = discord.PartialEmoji(
+                        name=m.group("ename"),
+                        id=int(m.group("eid")),
+                        animated=bool(m.group("anim"))
+                    )
+                if not label_text:
+                    num = (m.group("num") or "").strip()
+                    if num: label_text = num
 
     if not label_text and not emoji_obj:
         label_text = "Read here"
     return label_text, emoji_obj
+
+
+def link_button_row(label: str, url: str, emoji=None) -> list:
+    """A single link button as a raw ActionRow component (what View/Button would serialize to)."""
+    button = {"type": 2, "style": 5, "label": label, "url": url}
+    if isinstance(emoji, discord.PartialEmoji):
+        button["emoji"] = emoji.to_dict()
+    elif emoji:
+        button["emoji"] = {"name": emoji}
+    return [{"type": 1, "components": [button]}]
+
+
+async def send_raw_message(bot: discord.Client, channel_id: int, payload: dict):
+    """POST a ready-made message payload through the client's HTTP layer (same auth + rate limiting)."""
+    route = Route("POST", "/channels/{channel_id}/messages", channel_id=channel_id)
+    return await bot.http.request(route, json=payload)
 # ───────────────────────────────────────────────────────────────────────────────
 
 
@@ -235,9 +179,9 @@ async def send_new_paid_entries():
     last    = state.get(FEED_KEY)
     feed    = feedparser.parse(RSS_URL)
     all_ents = list(reversed(feed.entries))              # oldest → newest
-    entries  = [e for e in all_ents if _is_mistmint(e)]  # Mistmint-only
+    entries  = [e for e in all_ents if is_mistmint(e)]  # Mistmint-only
 
-    guids   = [_guid(e) for e in entries]
+    guids   = [entry_guid(e) for e in entries]
     to_send = entries[guids.index(last)+1:] if last in guids else entries
 
     if not to_send:
@@ -249,19 +193,25 @@ async def send_new_paid_entries():
 
     @bot.event
     async def on_ready():
-        _guids = [_guid(e) for e in entries]
+        _guids = [entry_guid(e) for e in entries]
         _last  = state.get(FEED_KEY)
         queue  = entries[_guids.index(_last)+1:] if _last in _guids else entries
 
+        # Resolve each host's mapping block once for the whole batch
+        host_blocks = {
+            h: HOSTING_SITE_DATA.get(h, {}) or {}
+            for h in {norm(e.get("host")) for e in queue}
+        }
+
         new_last = _last
         for entry in queue:
-            guid         = _guid(entry)
+            guid         = entry_guid(entry)
             short_code   = find_short_code_for_entry(entry)
             if not short_code:
                 print(f"⚠️ Skip: no short_code in entry guid={guid}")
                 continue
 
-            thread_id = _thread_id_for(short_code)
+            thread_id = thread_id_for(short_code)
             if not thread_id:
                 print(f"⚠️ Skip: no {short_code.upper()}_THREAD_ID secret set for guid={guid}")
                 continue
@@ -283,20 +233,20 @@ async def send_new_paid_entries():
                 continue
 
             # ── Build content (append NSFW role if category == NSFW)
-            title_text = _norm(entry.get("title"))
+            title_text = norm(entry.get("title"))
             nsfw_tail  = NSFW_ROLE if _is_nsfw(entry) else ""
             content = (
-                f"<a:Crown:1365575414550106154> 𝒫𝓇𝑒𝓂𝒾𝓊𝓂 𝒞𝒽𝒶𝓅𝓉𝑒𝓇 <a:TurtleDance:1365253970435510293>\n"
+                f"{HEADER_LINE}\n"
                 f"<a:1366_sweetpiano_happy:1368136820965249034> **{title_text}** <:pink_lock:1368266294855733291>"
             )
 
             # ── Embed
-            novel_title = _norm(entry.get("title"))
-            chaptername = _norm(entry.get("chaptername"))
-            nameextend  = _norm(entry.get("nameextend"))
-            link        = _norm(entry.get("link"))
-            translator  = _norm(entry.get("translator"))
-            host        = _norm(entry.get("host"))
+            novel_title = norm(entry.get("title"))
+            chaptername = norm(entry.get("chaptername"))
+            nameextend  = norm(entry.get("nameextend"))
+            link        = norm(entry.get("link"))
+            translator  = norm(entry.get("translator"))
+            host        = norm(entry.get("host"))
             thumb_url   = (entry.get("featuredImage") or entry.get("featuredimage") or {}).get("url")
             host_logo   = (entry.get("hostLogo") or entry.get("hostlogo") or {}).get("url")
             pub_raw     = getattr(entry, "published", None)
@@ -304,37 +254,42 @@ async def send_new_paid_entries():
             if timestamp and timestamp.tzinfo is None:
                 timestamp = timestamp.replace(tzinfo=timezone.utc)
 
-            embed = Embed(
-                title=f"<a:moonandstars:1365569468629123184>**{chaptername}**",
-                url=link,
-                description=nameextend or discord.Embed.Empty,
-                timestamp=timestamp,
-                color=int("A87676", 16),  # dusty rose
-            )
-            embed.set_author(name=f"{translator}˙ᵕ˙")
+            # Built directly in wire format; sent raw below (no Embed object)
+            embed_data = {
+                "title":  f"{_TITLE_PREFIX}{chaptername}**",
+                "url":    link,
+                "color":  DUSTY_ROSE,
+                "author": {"name": f"{translator}˙ᵕ˙"},
+                "footer": {"text": host, "icon_url": host_logo} if host_logo else {"text": host},
+            }
+            if nameextend:
+                embed_data["description"] = nameextend
+            if timestamp:
+                embed_data["timestamp"] = timestamp.isoformat()
             if thumb_url:
-                embed.set_thumbnail(url=thumb_url)
-            embed.set_footer(text=host, icon_url=host_logo)
+                embed_data["thumbnail"] = {"url": thumb_url}
 
             # ── Button (coin label/emoji if available)
-            coin_label_raw = _norm(entry.get("coin"))
+            coin_label_raw = norm(entry.get("coin"))
             label_text, emoji_obj = get_coin_button_parts(
-                host=host,
+                host_block=host_blocks.get(host, {}),
                 novel_title=novel_title,
                 fallback_price=coin_label_raw,
                 fallback_emoji=None,
             )
-            btn = Button(label=label_text or "Read here", url=link, emoji=emoji_obj)
-            view = View()
-            view.add_item(btn)
+            payload = {
+                "content":    content,
+                "embeds":     [embed_data],
+                "components": link_button_row(label_text or "Read here", link, emoji_obj),
+            }
 
             # Send with one retry if we hit archived/membership bounce
             try:
-                await dest.send(content=content, embed=embed, view=view)
+                await send_raw_message(bot, dest.id, payload)
             except HTTPException as e:
                 if isinstance(dest, discord.Thread) and e.status in (400, 403):
                     if await ensure_thread_ready(dest):
-                        await dest.send(content=content, embed=embed, view=view)
+                        await send_raw_message(bot, dest.id, payload)
                     else:
                         print(f"⚠️ Send retry failed for {thread_id}: {e}")
                         continue
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+chapters_common.py (mistmint-discord)
+
+Helpers shared by bot_free_chapters.py and bot_paid_chapters.py:
+state_rss.json IO, Mistmint entry filters, <SHORTCODE>_THREAD_ID lookup
+and thread join/unarchive. Each bot keeps its own config, message
+building and send loop.
+"""
+
+import os
+import re
+import json
+
+import discord
+from discord.errors import Forbidden, HTTPException
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+STATE_FILE = "state_rss.json"
+
+HOST_NAME_TARGET = "Mistmint Haven"  # only post items from this host
+# ───────────────────────────────────────────────────────────────────────────────
+
+
+# ─── STATE ─────────────────────────────────────────────────────────────────────
+def load_state():
+    try:
+        with open(STATE_FILE, "rb") as f:
+            return json.loads(f.read())
+    except (FileNotFoundError, json.JSONDecodeError):
+        initial = {"free_last_guid": None, "paid_last_guid": None, "comments_last_guid": None}
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(initial, f, separators=(",", ":"), ensure_ascii=False)
+        return initial
+
+
+def save_state(state):
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, separators=(",", ":"), ensure_ascii=False)
+
+
+# ─── ENTRY HELPERS ─────────────────────────────────────────────────────────────
+def norm(s): return (s or "").strip()
+def entry_guid(e): return norm(e.get("guid") or e.get("id")) or None
+
+def is_mistmint(e):
+    host = norm(e.get("host") or e.get("Host") or e.get("HOST"))
+    return host.lower() == HOST_NAME_TARGET.lower()
+
+def thread_id_for(short_code):
+    if not short_code: return None
+    env_key = re.sub(r"[^A-Z0-9]+", "_", short_code.upper()) + "_THREAD_ID"
+    val = os.getenv(env_key)
+    try:
+        return int(val) if val else None
+    except ValueError:
+        return None
+
+
+# ─── THREAD HELPERS ────────────────────────────────────────────────────────────
+AUTO_ARCHIVE_ALLOWED = {60, 1440, 4320, 10080}
+
+# Turn on later (e.g., set env USE_UNARCHIVE=1) when the bot has Manage Threads
+USE_UNARCHIVE = os.getenv("USE_UNARCHIVE", "0") == "1"
+
+async def ensure_unarchived(thread: discord.Thread, *, unlock: bool = True, auto_archive_minutes: int = 10080) -> bool:
+    """
+    Make sure the thread is unarchived (and optionally unlocked) before sending.
+    Requires the bot to have 'Manage Threads'. Falls back gracefully if the
+    guild doesn't allow 7-day auto archive.
+    """
+    if not isinstance(thread, discord.Thread):
+        return True
+
+    # Pick a valid auto-archive duration the guild supports (best-effort)
+    duration = min(AUTO_ARCHIVE_ALLOWED, key=lambda v: abs(v - auto_archive_minutes))
+
+    try:
+        # First try: unarchive directly
+        await thread.edit(
+            archived=False,
+            locked=(not unlock),
+            auto_archive_duration=duration
+        )
+        return True
+    except Forbidden:
+        # If we can’t edit (missing perms or not a member), try joining then edit again
+        try:
+            await thread.join()
+        except Exception:
+            pass
+        try:
+            await thread.edit(
+                archived=False,
+                locked=(not unlock),
+                auto_archive_duration=duration
+            )
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not unarchive thread {thread.id}: {e}")
+            return False
+    except HTTPException as e:
+        # Some servers don’t allow 10080; retry without changing duration
+        if e.status == 400:
+            try:
+                await thread.edit(archived=False, locked=(not unlock))
+                return True
+            except Exception as e2:
+                print(f"⚠️ Unarchive retry (no duration) failed for {thread.id}: {e2}")
+                return False
+        print(f"⚠️ HTTPException unarchiving {thread.id}: {e}")
+        return False
+    except Exception as e:
+        print(f"⚠️ Unexpected error unarchiving {thread.id}: {e}")
+        return False
+
+
+async def ensure_thread_ready(thread_or_channel) -> bool:
+    """
+    If it's a Thread: join it (idempotent). Only attempt unarchive when
+    USE_UNARCHIVE=1 (i.e., when the bot has Manage Threads).
+    """
+    if isinstance(thread_or_channel, discord.Thread):
+        try:
+            await thread_or_channel.join()  # safe to call repeatedly
+        except Exception:
+            pass
+        if USE_UNARCHIVE:
+            return await ensure_unarchived(
+                thread_or_channel, unlock=True, auto_archive_minutes=10080
+            )
+        return True
+    return True
@@ -21,17 +21,30 @@ Notes:
 """
 
 import argparse
+import atexit
+import functools
+import hashlib
+import io
 import json
 import os
 import re
 import sys
-from datetime import datetime
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple
 
-import feedparser
 import time
 import subprocess
 import requests
-from dateutil.relativedelta import relativedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional: faster state.json decode/encode
+except ImportError:
+    orjson = None
 
 # Try to load your mapping package from rss-feed repo
 try:
@@ -49,19 +62,58 @@ COMPLETE_ROLE    = "<@&1329502614110474270>"  # kept for future if you ever add
 
 # Only attempt PATCH /channels/{id} when the bot has Manage Threads
 USE_UNARCHIVE = os.getenv("USE_UNARCHIVE", "0") == "1"
+
+# Feeds are fetched concurrently (network-bound); Discord sends stay sequential
+FEED_FETCH_WORKERS = 8
+
+# Hashes of recently sent messages live in state.json under this key, so a
+# re-run that lost its state write can't post the same announcement twice.
+# The other state.json writers (new_novel_checker, new_extra_checker) only
+# look novels up by title and write the whole dict back, so this non-novel
+# key is never read as a novel and survives their saves.
+SENT_HASHES_KEY = "_sent_hashes"
+SENT_HASH_TTL   = timedelta(hours=24)
 # ────────────────────────────────────────────────────────────────────────────────
 
 
+# ─── HTTP SESSION ──────────────────────────────────────────────────────────────
+def _make_session() -> requests.Session:
+    """
+    One pooled keep-alive session for feeds + Discord, so each host's TLS
+    handshake happens once per run. Transient 5xx/429 are retried with
+    backoff for idempotent methods only (POST is never auto-retried, so an
+    announcement can't be double-posted); Discord 429s on POST are still
+    handled in send_bot_message.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        backoff_max=4,                     # no single retry sleep longer than this
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=False,  # long Retry-After → refetch_hint, not a blocking sleep
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _make_session()
+
+
 # ─── STATE IO ──────────────────────────────────────────────────────────────────
 def load_state(path=STATE_PATH):
     try:
-        with open(path, encoding="utf-8") as f:
+        with open(path, "rb") as f:
             raw = f.read().strip()
             if not raw:
                 # empty file → treat as empty state
                 return {}
             try:
-                return json.loads(raw)
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                return orjson.loads(raw) if orjson is not None else json.loads(raw)
             except json.JSONDecodeError:
                 # malformed JSON → ignore and start fresh in-memory
                 print(f"⚠️ {path} contained invalid JSON; using empty state.", file=sys.stderr)
@@ -71,8 +123,23 @@ def load_state(path=STATE_PATH):
 
 
 def save_state(state, path=STATE_PATH):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, ensure_ascii=False)
+    """
+    Atomic write: dump to <path>.tmp, fsync, then os.replace() over the real
+    file, so a crash mid-write can't leave a truncated state.json behind.
+    Indented like the other checkers that share state.json, so the file
+    keeps one format whichever script wrote it last.
+    """
+    if orjson is not None:
+        data = orjson.dumps(state, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(state, indent=2, ensure_ascii=False).encode("utf-8")
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
 
 def commit_state_update(path=STATE_PATH):
@@ -92,6 +159,29 @@ def commit_state_update(path=STATE_PATH):
 
 
 # ─── DISCORD SENDER ────────────────────────────────────────────────────────────
+# Discord reports the bucket in X-RateLimit-Remaining / -Reset-After on every
+# response; once it hits 0 the next send waits out the reset instead of eating a 429.
+_send_not_before = 0.0   # time.monotonic() deadline
+
+
+def note_send_bucket(r):
+    global _send_not_before
+    if r.headers.get("X-RateLimit-Remaining") != "0":
+        return
+    try:
+        reset_after = float(r.headers.get("X-RateLimit-Reset-After", "1"))
+    except (TypeError, ValueError):
+        reset_after = 1.0
+    _send_not_before = time.monotonic() + min(max(reset_after, 0.0), 10.0)
+
+
+def wait_for_send_bucket():
+    delay = _send_not_before - time.monotonic()
+    if delay > 0:
+        print(f"ℹ️ Discord bucket exhausted; waiting {delay:.2f}s")
+        time.sleep(delay)
+
+
 def send_bot_message(bot_token: str, channel_or_thread_id: str, content: str):
     """
     POST message via bot token to the given channel/thread ID.
@@ -111,7 +201,10 @@ def send_bot_message(bot_token: str, channel_or_thread_id: str, content: str):
     }
   
     def _send():
-        return requests.post(url, headers=headers, json=payload, timeout=20)
+        wait_for_send_bucket()
+        r = SESSION.post(url, headers=headers, json=payload, timeout=20)
+        note_send_bucket(r)
+        return r
 
     # Preflight: join thread is always safe; unarchive only when allowed
     ensure_bot_in_thread(bot_token, channel_or_thread_id)
@@ -166,7 +259,7 @@ def unarchive_thread(bot_token: str, thread_id: str, *, unlock: bool = True, aut
         payload["locked"] = False
     if auto_archive_minutes:
         payload["auto_archive_duration"] = auto_archive_minutes  # 60, 1440, 4320, 10080
-    r = requests.patch(url, headers=headers, json=payload, timeout=15)
+    r = SESSION.patch(url, headers=headers, json=payload, timeout=15)
     if not r.ok:
         print(f"⚠️ Unarchive failed {r.status_code}: {r.text}")
     return r.ok
@@ -174,12 +267,12 @@ def unarchive_thread(bot_token: str, thread_id: str, *, unlock: bool = True, aut
 def ensure_bot_in_thread(bot_token: str, thread_id: str) -> bool:
     try:
         h = {"Authorization": f"Bot {bot_token}"}
-        r = requests.get(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me",
-                         headers=h, timeout=15)
+        r = SESSION.get(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me",
+                        headers=h, timeout=15)
         if r.status_code == 200:
             return True
-        j = requests.put(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me",
-                         headers=h, timeout=15)
+        j = SESSION.put(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me",
+                        headers=h, timeout=15)
         return j.status_code in (200, 204)
     except requests.RequestException:
         return False
@@ -203,183 +296,422 @@ def safe_send_bot(bot_token: str, channel_or_thread_id: str, content: str) -> bo
         return False
 
 
+def message_hash(channel_or_thread_id: str, content: str) -> str:
+    return hashlib.blake2b(f"{channel_or_thread_id}\n{content}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def recent_sent_hashes(state: dict, now: datetime) -> dict:
+    """state[SENT_HASHES_KEY] as {hash: sent_at ISO}, pruned to the last SENT_HASH_TTL."""
+    sent   = state.setdefault(SENT_HASHES_KEY, {})
+    cutoff = now - SENT_HASH_TTL
+    for h, sent_at in list(sent.items()):
+        try:
+            keep = datetime.fromisoformat(sent_at) >= cutoff
+        except (TypeError, ValueError):
+            keep = False
+        if not keep:
+            del sent[h]
+    return sent
+
+
+def send_once(bot_token: str, channel_or_thread_id: str, content: str, sent: dict, now: datetime) -> bool:
+    """
+    safe_send_bot, skipped (reported as sent) when the identical message went
+    to the same thread within SENT_HASH_TTL. Records the hash on success.
+    """
+    h = message_hash(channel_or_thread_id, content)
+    if h in sent:
+        print(f"ℹ️ Identical message already sent to {channel_or_thread_id} at {sent[h]}; not reposting")
+        return True
+    if not safe_send_bot(bot_token, channel_or_thread_id, content):
+        return False
+    sent[h] = now.isoformat()
+    return True
+
+
 # ─── HELPERS ───────────────────────────────────────────────────────────────────
 
-def get_duration(start_date_str: str, end_date: datetime) -> str:
+def _phrase(n: int, unit: str) -> str:
+    """'a month' / '3 months'."""
+    return f"a {unit}" if n == 1 else f"{n} {unit}s"
+
+
+# (years > 0, months > 0) → formatter; sub-month spans fall through to weeks
+_DURATION_FORMATS = {
+    (True,  True):  lambda y, m: f"{_phrase(y, 'year')} and {_phrase(m, 'month')}",
+    (True,  False): lambda y, m: _phrase(y, "year"),
+    (False, True):  lambda y, m: _phrase(m, "month"),
+}
+
+
+START_DATE_FORMAT = "%d/%m/%Y"
+
+
+def parse_start_date(start_date_str: str) -> datetime | None:
     """
-    Converts a start date (DD/MM/YYYY) to a human-readable duration vs end_date.
+    DD/MM/YYYY → datetime, parsed once per novel at load time.
+    Empty means 01/01/2024 (historical default); unparseable → None.
     """
     try:
-        day, month, year = map(int, (start_date_str or "01/01/2024").split("/"))
-        start = datetime(year, month, day)
-    except Exception:
-        start = end_date
+        return datetime.strptime((start_date_str or "01/01/2024").strip(), START_DATE_FORMAT)
+    except (TypeError, ValueError):
+        print(f"⚠️ Unparseable start_date {start_date_str!r} (want DD/MM/YYYY); duration will read 'less than a week'")
+        return None
 
-    delta = relativedelta(end_date, start)
 
-    years = delta.years
-    months = delta.months
-    days = delta.days
+@functools.lru_cache(maxsize=512)
+def get_duration(start: datetime | None, end_date: datetime) -> str:
+    """
+    Converts a start date (see parse_start_date) to a human-readable duration vs end_date.
+    """
+    from dateutil.relativedelta import relativedelta  # only needed when announcing
 
-    if years > 0:
-        if months > 0:
-            return (
-                f"{'a' if years == 1 else years} year{'s' if years > 1 else ''} "
-                f"and {'a' if months == 1 else months} month{'s' if months > 1 else ''}"
-            )
-        return f"{'a' if years == 1 else years} year{'s' if years > 1 else ''}"
+    if start is None:
+        start = end_date
 
-    if months > 0:
-        return f"{'a' if months == 1 else months} month{'s' if months > 1 else ''}"
+    delta = relativedelta(end_date, start)
 
-    weeks = days // 7
-    remaining_days = days % 7
+    fmt = _DURATION_FORMATS.get((delta.years > 0, delta.months > 0))
+    if fmt:
+        return fmt(delta.years, delta.months)
+
+    weeks = delta.days // 7
     if weeks > 0:
         return f"{weeks} week{'s' if weeks != 1 else ''}"
-    if remaining_days > 0:
+    if delta.days % 7 > 0:
         return "more than a week"
     return "less than a week"
 
 
+_SHORTCODE_RE = re.compile(r"[^A-Z0-9]+")
+
+# <SHORTCODE>_THREAD_ID secrets, snapshotted once (the env doesn't change mid-run)
+_THREAD_ENV = {k: v.strip() for k, v in os.environ.items() if k.endswith("_THREAD_ID")}
+
+
+@functools.lru_cache(maxsize=None)
 def sanitize_shortcode_from_title(title: str) -> str:
     """
     Build an env-safe fallback key from the novel title.
     """
     up = (title or "").upper()
-    return re.sub(r"[^A-Z0-9]+", "_", up).strip("_")
+    return _SHORTCODE_RE.sub("_", up).strip("_")
 
 
 def thread_env_key_for(short_code: str) -> str:
     return f"{short_code}_THREAD_ID"
 
 
-def resolve_thread_id(novel_title: str, details: dict) -> str | None:
+def thread_env_key_for_novel(novel_title: str, short_code: str | None) -> str:
     """
-    Find the per-novel thread id from env using the short_code if available,
-    otherwise derive a best-effort key from the title.
+    <SHORTCODE>_THREAD_ID for a novel, using the short_code if available,
+    otherwise a best-effort key derived from the title.
     """
-    short_code = (details.get("short_code") or "").strip()
+    short_code = (short_code or "").strip()
     if not short_code:
         short_code = sanitize_shortcode_from_title(novel_title)
-    env_key = thread_env_key_for(short_code.upper())
-    val = os.getenv(env_key, "").strip()
-    return val or None
+    return thread_env_key_for(short_code.upper())
+
+
+def feed_may_contain(raw_xml: bytes, marker: str) -> bool:
+    """
+    Cheap substring check on the raw feed bytes before paying for feedparser.
+    Only says False when the marker can't be in any entry; markers XML
+    might escape or encode differently (non-ASCII, &<>"') always pass,
+    as do UTF-16/32 bodies where ASCII isn't stored byte-for-byte.
+    Words are checked separately since the feed may space them with NBSP.
+    """
+    if not marker.isascii() or any(c in marker for c in "&<>\"'"):
+        return True
+    if b"\x00" in raw_xml[:4] or raw_xml[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return True
+    return all(word.encode("ascii") in raw_xml for word in marker.split())
+
+
+@functools.lru_cache(maxsize=None)
+def marker_pattern(marker_norm: str) -> re.Pattern:
+    """
+    last_chapter match, compiled once per marker. Digits may not continue the
+    number on either side, so "Chapter 12" doesn't hit "Chapter 120" and a
+    marker like "2 (END)" doesn't hit "Chapter 12 (END)".
+    """
+    return re.compile(r"(?<!\d)" + re.escape(marker_norm) + r"(?!\d)")
+
+
+def chapter_matches(chap_field: str, marker_norm: str) -> bool:
+    # exact equality is the common hit and skips the regex entirely
+    chap_norm = chap_field.replace("\u00A0", " ").strip()
+    return chap_norm == marker_norm or marker_pattern(marker_norm).search(chap_norm) is not None
+
+
+def scan_rss_items(raw_xml: bytes, marker_norm: str) -> list[dict] | None:
+    """
+    Fast path for plain RSS 2.0: stream <item>s with ElementTree (expat) and
+    stop at the first one whose chaptername/chapter contains the marker.
+    Returns [entry] shaped like a feedparser entry (chaptername, link,
+    published), [] when no item matches, or None when the feed isn't
+    plain well-formed RSS — the caller then falls back to feedparser.
+    """
+    seen_item = False
+    try:
+        for _, el in ET.iterparse(io.BytesIO(raw_xml)):
+            if el.tag != "item":
+                continue
+            seen_item = True
+            chap = (el.findtext("chaptername") or el.findtext("chapter") or "").strip()
+            if not chapter_matches(chap, marker_norm):
+                el.clear()
+                continue
+
+            return [{
+                "chaptername": chap,
+                "link":        (el.findtext("link") or "").strip(),
+                "published":   (el.findtext("pubDate") or "").strip(),  # parsed by entry_datetime
+            }]
+    except ET.ParseError:
+        return None
+    return [] if seen_item else None
+
+
+def entry_datetime(entry) -> datetime:
+    """
+    Chapter timestamp (naive UTC) for the matched entry only. feedparser
+    entries already carry *_parsed; the ElementTree fast path hands over the
+    raw pubDate text, which is parsed here on demand (RFC 822, else ISO 8601).
+    """
+    for key in ("published_parsed", "updated_parsed"):
+        if entry.get(key):
+            return datetime(*entry[key][:6])
+
+    raw = entry.get("published") or entry.get("updated")
+    if raw:
+        try:
+            dt = parsedate_to_datetime(raw)
+        except (TypeError, ValueError):
+            try:
+                dt = datetime.fromisoformat(raw)
+            except ValueError:
+                dt = None
+        if dt is not None:
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            return dt
+    return datetime.now()
+
+
+# ─── FEED FETCH (conditional GET) ──────────────────────────────────────────────
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)", re.IGNORECASE)
+
+
+def feed_cache_for(state: dict, novel_id: str, feed_key: str, url: str, marker_norm: str) -> dict:
+    """
+    Per-novel, per-feed HTTP cache entry stored in state.json:
+      state[novel_id]["feed_cache"][feed_key] = {url, marker, etag, last_modified, do_not_refetch_before}
+    Validators belong to the URL they came from and the last_chapter marker
+    they were checked against; if the mapping points the feed somewhere else
+    or names a different final chapter, the entry starts over instead of
+    letting a 304 hide a completion the old marker never matched.
+    """
+    cache = state.setdefault(novel_id, {}).setdefault("feed_cache", {}).setdefault(feed_key, {})
+    if cache.get("url") != url or cache.get("marker") != marker_norm:
+        cache.clear()
+        cache["url"]    = url
+        cache["marker"] = marker_norm
+    return cache
+
+
+def refetch_blocked(cache: dict, now: datetime) -> bool:
+    """True while a previous Cache-Control max-age / Retry-After window is still open."""
+    until = cache.get("do_not_refetch_before")
+    if not until:
+        return False
+    try:
+        return now < datetime.fromisoformat(until)
+    except ValueError:
+        return False
+
+
+def fetch_feed(url: str, headers: dict):
+    """GET one feed. Returns the Response, or the RequestException so one bad feed doesn't sink the batch."""
+    try:
+        return SESSION.get(url, headers=headers, timeout=20)
+    except requests.RequestException as e:
+        return e
+
+
+def conditional_headers(cache: dict) -> dict:
+    headers = {}
+    if cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    if cache.get("last_modified"):
+        headers["If-Modified-Since"] = cache["last_modified"]
+    return headers
+
+
+def refetch_hint(resp, now: datetime) -> str | None:
+    """
+    Earliest time (ISO, UTC) worth asking again, from Retry-After (seconds or
+    HTTP date) or Cache-Control max-age. None when the server gave no hint.
+    """
+    retry_after = (resp.headers.get("Retry-After") or "").strip()
+    if retry_after:
+        if retry_after.isdigit():
+            return (now + timedelta(seconds=int(retry_after))).isoformat()
+        try:
+            return parsedate_to_datetime(retry_after).astimezone(timezone.utc).isoformat()
+        except (TypeError, ValueError):
+            pass
+    m = _MAX_AGE_RE.search(resp.headers.get("Cache-Control") or "")
+    if m and int(m.group(1)) > 0:
+        return (now + timedelta(seconds=int(m.group(1)))).isoformat()
+    return None
 
 
 # ─── MESSAGE BUILDERS (mentions/footer removed for Mistmint) ───────────────────
+DIVIDER_LINE      = "<:purple_divider1:1365652778957144165>" * 10
+PINK_DIVIDER_LINE = "<:FF_Divider_Pink:1365575626194681936>" * 5
+
+def _bake_dividers(template: str) -> str:
+    """Fill the fixed divider lines in once at import (they contain no braces)."""
+    return (template
+            .replace("{divider_line}", DIVIDER_LINE)
+            .replace("{pink_divider_line}", PINK_DIVIDER_LINE))
+
+
+# Filled with str.format_map(); placeholders come from _completion_fields()
+PAID_COMPLETION_TEMPLATE = _bake_dividers(
+    "## ꧁ᐟᐟ ◌ೄ⟢  Completion Announcement  :blueberries: ˚. ᵎᵎ˖ˎˊ-\n"
+    "{divider_line}\n"
+    "***<a:kikilts_bracket:1365693072138174525>[{title}]({link})"
+    "<a:lalalts_bracket:1365693058905014313> — officially completed!*** "
+    "<a:cowiggle:1368136766791483472><a:whitesparkles:1365569806966853664>\n\n"
+    "*The last chapter, [{chap_text}]({chap_link}), has now been released. "
+    "<a:turtle_hyper:1365223449827737630>\n"
+    "After {duration} of updates, {title} is now fully translated with "
+    "{count}! Thank you for coming on this journey and for your continued "
+    "support <:turtle_plead:1365223487274352670> You can now visit {host} "
+    "to binge all advance releases~*<a:Heart:1365575427724283944>"
+    "<a:Paws:1365676154865979453>\n"
+    "{pink_divider_line}"
+)
+
+FREE_COMPLETION_TEMPLATE = _bake_dividers(
+    "## 𐔌  Announcing: Complete Series Unlocked ,, :cherries: — 𝝑𝝔  ꒱\n"
+    "{divider_line}\n"
+    "***<a:kikilts_bracket:1365693072138174525>[{title}]({link})"
+    "<a:lalalts_bracket:1365693058905014313>— complete access granted!*** "
+    "<a:cowiggle:1368136766791483472><a:whitesparkles:1365569806966853664>\n\n"
+    "*All {count} has been unlocked and ready for you to binge—completely free!\n"
+    "Thank you all for your amazing support "
+    "<:green_turtle_heart:1365264636064305203>\n"
+    "Head over to {host} to dive straight in~*"
+    "<a:Heart:1365575427724283944><a:Paws:1365676154865979453>\n"
+    "{pink_divider_line}"
+)
+
+ONLY_FREE_COMPLETION_TEMPLATE = _bake_dividers(
+    "## ⁺‧ ༻•┈๑☽₊˚ ⌞Completion Announcement⋆ཋྀ ˚₊‧⁺ :kiwi: ∗༉‧₊˚\n"
+    "{divider_line}\n"
+    "***<a:kikilts_bracket:1365693072138174525>[{title}]({link})"
+    "<a:lalalts_bracket:1365693058905014313> — officially completed!*** "
+    "<a:cowiggle:1368136766791483472><a:whitesparkles:1365569806966853664>\n\n"
+    "*The last chapter, [{chap_text}]({chap_link}), has now been released. "
+    "<a:turtle_hyper:1365223449827737630>\n"
+    "After {duration} of updates, {title} is now fully translated with "
+    "{count}! Thank you for coming on this journey and for your continued "
+    "support <:luv_turtle:365263712549736448> You can now visit {host} "
+    "to binge on all the releases~*<a:Heart:1365575427724283944>"
+    "<a:Paws:1365676154865979453>\n"
+    "{pink_divider_line}"
+)
+
+
+def _completion_fields(novel: "Novel", chap_field=None, chap_link="", duration: str = "") -> dict:
+    return {
+        "title":     novel.novel_title,
+        "link":      novel.novel_link,
+        "host":      novel.host,
+        "count":     novel.chapter_count,
+        "chap_text": (chap_field or "").replace("\u00A0", " "),
+        "chap_link": chap_link,
+        "duration":  duration,
+    }
+
+
 def build_paid_completion(novel, chap_field, chap_link, duration: str):
-    title       = novel.get("novel_title", "")
-    link        = novel.get("novel_link", "")
-    host        = novel.get("host", "")
-    count       = novel.get("chapter_count", "the entire series")
-    DIV         = "<:purple_divider1:1365652778957144165>"
-    divider_line = DIV * 10
-
-    chap_text = (chap_field or "").replace("\u00A0", " ")
-
-    return (
-        "## ꧁ᐟᐟ ◌ೄ⟢  Completion Announcement  :blueberries: ˚. ᵎᵎ˖ˎˊ-\n"
-        f"{divider_line}\n"
-        f"***<a:kikilts_bracket:1365693072138174525>[{title}]({link})"
-        f"<a:lalalts_bracket:1365693058905014313> — officially completed!*** "
-        f"<a:cowiggle:1368136766791483472><a:whitesparkles:1365569806966853664>\n\n"
-        f"*The last chapter, [{chap_text}]({chap_link}), has now been released. "
-        f"<a:turtle_hyper:1365223449827737630>\n"
-        f"After {duration} of updates, {title} is now fully translated with "
-        f"{count}! Thank you for coming on this journey and for your continued "
-        f"support <:turtle_plead:1365223487274352670> You can now visit {host} "
-        f"to binge all advance releases~*<a:Heart:1365575427724283944>"
-        f"<a:Paws:1365676154865979453>\n"
-        f"{'<:FF_Divider_Pink:1365575626194681936>' * 5}"
+    return PAID_COMPLETION_TEMPLATE.format_map(
+        _completion_fields(novel, chap_field, chap_link, duration)
     )
 
 
-def build_free_completion(novel, chap_field, chap_link):
-    title       = novel.get("novel_title", "")
-    link        = novel.get("novel_link", "")
-    host        = novel.get("host", "")
-    count       = novel.get("chapter_count", "the entire series")
-    DIV         = "<:purple_divider1:1365652778957144165>"
-    divider_line = DIV * 10
-
-    chap_text = (chap_field or "").replace("\u00A0", " ")
-
-    return (
-        "## 𐔌  Announcing: Complete Series Unlocked ,, :cherries: — 𝝑𝝔  ꒱\n"
-        f"{divider_line}\n"
-        f"***<a:kikilts_bracket:1365693072138174525>[{title}]({link})"
-        f"<a:lalalts_bracket:1365693058905014313>— complete access granted!*** "
-        f"<a:cowiggle:1368136766791483472><a:whitesparkles:1365569806966853664>\n\n"
-        f"*All {count} has been unlocked and ready for you to binge—completely free!\n"
-        f"Thank you all for your amazing support "
-        f"<:green_turtle_heart:1365264636064305203>\n"
-        f"Head over to {host} to dive straight in~*"
-        f"<a:Heart:1365575427724283944><a:Paws:1365676154865979453>\n"
-        f"{'<:FF_Divider_Pink:1365575626194681936>' * 5}"
-    )
+def build_free_completion(novel):
+    return FREE_COMPLETION_TEMPLATE.format_map(_completion_fields(novel))
 
 
 def build_only_free_completion(novel, chap_field, chap_link, duration: str):
-    title       = novel.get("novel_title", "")
-    link        = novel.get("novel_link", "")
-    host        = novel.get("host", "")
-    count       = novel.get("chapter_count", "the entire series")
-    DIV         = "<:purple_divider1:1365652778957144165>"
-    divider_line = DIV * 10
-
-    chap_text = (chap_field or "").replace("\u00A0", " ")
-
-    return (
-        "## ⁺‧ ༻•┈๑☽₊˚ ⌞Completion Announcement⋆ཋྀ ˚₊‧⁺ :kiwi: ∗༉‧₊˚\n"
-        f"{divider_line}\n"
-        f"***<a:kikilts_bracket:1365693072138174525>[{title}]({link})"
-        f"<a:lalalts_bracket:1365693058905014313> — officially completed!*** "
-        f"<a:cowiggle:1368136766791483472><a:whitesparkles:1365569806966853664>\n\n"
-        f"*The last chapter, [{chap_text}]({chap_link}), has now been released. "
-        f"<a:turtle_hyper:1365223449827737630>\n"
-        f"After {duration} of updates, {title} is now fully translated with "
-        f"{count}! Thank you for coming on this journey and for your continued "
-        f"support <:luv_turtle:365263712549736448> You can now visit {host} "
-        f"to binge on all the releases~*<a:Heart:1365575427724283944>"
-        f"<a:Paws:1365676154865979453>\n"
-        f"{'<:FF_Divider_Pink:1365575626194681936>' * 5}"
+    return ONLY_FREE_COMPLETION_TEMPLATE.format_map(
+        _completion_fields(novel, chap_field, chap_link, duration)
     )
 
 
+def _mark_sent(state: dict, novel_id: str, key: str, chap_field: str):
+    state.setdefault(novel_id, {})[key] = {
+        "chapter": chap_field,
+        "sent_at": datetime.now().isoformat()
+    }
+
+
 # ─── DATA LOAD ─────────────────────────────────────────────────────────────────
-def load_novels() -> list[dict]:
+class Novel(NamedTuple):
+    """One Mistmint novel from HOSTING_SITE_DATA, flattened for the checker."""
+    novel_title:      str
+    role_mention:     str
+    host:             str
+    novel_link:       str
+    chapter_count:    str
+    last_chapter:     str
+    start_date:       datetime | None   # parsed once by parse_start_date
+    free_feed:        str | None
+    paid_feed:        str | None
+    discord_role_url: str
+    short_code:       str   # used for thread env
+
+
+def load_novels(feed_key: str | None = None) -> list[Novel]:
     """
     Pull novels directly from HOSTING_SITE_DATA, but only include:
       - host == "Mistmint Haven"
       - last_chapter is defined
-      - at least one feed present (free or paid)
+      - at least one feed present (free or paid), or the given feed_key's feed
     """
-    novels = []
-    for host, host_data in (HOSTING_SITE_DATA or {}).items():
-        if host != HOST_NAME_TARGET:
+    novels    = []
+    host      = HOST_NAME_TARGET
+    # Direct lookup: the other hosts' novels are never walked
+    host_data = (HOSTING_SITE_DATA or {}).get(host) or {}
+    for title, details in host_data.get("novels", {}).items():
+        last = details.get("last_chapter")
+        if not last:
+            continue
+        free = details.get("free_feed")
+        paid = details.get("paid_feed")
+        if not (free or paid):
+            continue
+        if feed_key and not details.get(feed_key):
             continue
-        for title, details in host_data.get("novels", {}).items():
-            last = details.get("last_chapter")
-            if not last:
-                continue
-            free = details.get("free_feed")
-            paid = details.get("paid_feed")
-            if not (free or paid):
-                continue
 
-            novels.append({
-                "novel_title":      title,
-                "role_mention":     details.get("discord_role_id", ""),
-                "host":             host,
-                "novel_link":       details.get("novel_url", ""),
-                "chapter_count":    details.get("chapter_count", ""),
-                "last_chapter":     last,
-                "start_date":       details.get("start_date", ""),
-                "free_feed":        free,
-                "paid_feed":        paid,
-                "discord_role_url": details.get("discord_role_url", ""),
-                "short_code":       details.get("short_code", ""),  # used for thread env
-            })
+        novels.append(Novel(
+            novel_title      = title,
+            role_mention     = details.get("discord_role_id", ""),
+            host             = host,
+            novel_link       = details.get("novel_url", ""),
+            chapter_count    = details.get("chapter_count", ""),
+            last_chapter     = last,
+            start_date       = parse_start_date(details.get("start_date", "")),
+            free_feed        = free,
+            paid_feed        = paid,
+            discord_role_url = details.get("discord_role_url", ""),
+            short_code       = details.get("short_code", ""),
+        ))
     return novels
 
 
@@ -393,124 +725,179 @@ def main():
     if not bot_token:
         sys.exit("❌ Missing DISCORD_BOT_TOKEN")
 
+    feed_type      = args.feed              # "paid" or "free"
+    feed_key       = f"{feed_type}_feed"    # "paid_feed" or "free_feed"
+    completion_key = "paid_completion" if feed_type == "paid" else "free_completion"
+    now            = datetime.now(timezone.utc)
+
     state  = load_state()
-    novels = load_novels()
+    novels = load_novels(feed_key)   # already limited to novels that have this feed
+    dirty     = False   # state changed and not yet written
+    announced = False   # at least one completion was recorded → commit state.json
 
-    for novel in novels:
-        novel_id  = novel["novel_title"]
-        last_chap = novel.get("last_chapter")
-        if not last_chap:
-            continue
+    # state.json is written once per run; atexit keeps progress on Ctrl-C / sys.exit
+    def flush_state():
+        nonlocal dirty
+        if dirty:
+            save_state(state)
+            dirty = False
 
-        # route: per-novel thread id (required; no fallback)
-        thread_id = resolve_thread_id(novel_id, novel)
-        if not thread_id:
-            print(f"❌ No thread env set for {novel_id}. Define {sanitize_shortcode_from_title(novel_id)}_THREAD_ID.")
-            continue
+    atexit.register(flush_state)
 
-        feed_type = args.feed              # "paid" or "free"
-        feed_key  = f"{feed_type}_feed"    # "paid_feed" or "free_feed"
-        url       = novel.get(feed_key)
-        if not url:
-            # Skip if this novel lacks the requested feed type
-            continue
+    sent_hashes = recent_sent_hashes(state, now)
 
-        # Generic skip check before parsing
-        completion_key = "paid_completion" if feed_type == "paid" else "free_completion"
+    # Thread routing for every novel in one pass; missing secrets are reported together
+    thread_keys     = {n.novel_title: thread_env_key_for_novel(n.novel_title, n.short_code) for n in novels}
+    missing_threads = []
+
+    # 1) Pick the novels whose feed needs a look (no network yet)
+    work = []
+    for novel in novels:
+        novel_id = novel.novel_title
+        url      = getattr(novel, feed_key)
+
+        # Already-notified guards first: cheapest check, and the common case
         if state.get(novel_id, {}).get(completion_key):
             print(f"→ skipping {novel_id} ({completion_key}) — already notified")
             continue
+        if feed_type == "free" and not novel.paid_feed and state.get(novel_id, {}).get("only_free_completion"):
+            print(f"→ skipping {novel_id} (only_free_completion) — already notified")
+            continue
 
-        # Fetch + parse RSS
-        try:
-            resp = requests.get(url, timeout=20)
-            resp.raise_for_status()
-        except requests.RequestException as e:
-            print(f"⚠️ Failed to fetch feed for {novel_id}: {e}")
+        # route: per-novel thread id (required; no fallback)
+        thread_id = _THREAD_ENV.get(thread_keys[novel_id])
+        if not thread_id:
+            missing_threads.append(novel_id)
             continue
 
-        feed = feedparser.parse(resp.text)
-        print(f"Parsing {feed_key} for {novel_id}: {len(feed.entries)} entries")
+        # Entries are newest-first, so the scan in step 3 stops at the first (newest)
+        # hit; the marker is normalised once here, not per entry
+        last_chap   = novel.last_chapter
+        marker_norm = last_chap.replace("\u00A0", " ").strip() or last_chap
+        cache = feed_cache_for(state, novel_id, feed_key, url, marker_norm)
+        if refetch_blocked(cache, now):
+            print(f"→ skipping {novel_id} ({feed_key}) — server asked not to refetch before {cache['do_not_refetch_before']}")
+            continue
 
-        # Search for the last_chapter marker in feed entries
-        for entry in feed.entries:
-            chap_field = entry.get("chaptername") or entry.get("chapter", "") or ""
-            if last_chap not in chap_field:
+        work.append((novel, thread_id, url, marker_norm, cache))
+
+    if missing_threads:
+        print(f"❌ No thread env set for {len(missing_threads)} novel(s):")
+        for novel_id in missing_threads:
+            print(f"   - {novel_id}: define {thread_keys[novel_id]}")
+
+    if not work:
+        print(f"ℹ️ No {feed_key} feeds to check.")
+        return
+
+    # 2) Fetch all feeds concurrently (conditional GET; unchanged feeds come back 304).
+    #    Novels sharing a feed URL (and validators) share one request, and step 3
+    #    starts on the first feed while the rest are still downloading.
+    fetch_keys = [(url, tuple(sorted(conditional_headers(cache).items()))) for _, _, url, _, cache in work]
+    with ThreadPoolExecutor(max_workers=min(FEED_FETCH_WORKERS, len(work))) as pool:
+        fetches = {k: pool.submit(fetch_feed, k[0], dict(k[1])) for k in dict.fromkeys(fetch_keys)}
+        parsed  = {}   # fetch key → feedparser entries, for feeds the fast path couldn't scan
+
+        # 3) Parse + announce one novel at a time (keeps Discord sends sequential)
+        for (novel, thread_id, url, marker_norm, cache), fetch_key in zip(work, fetch_keys):
+            novel_id  = novel.novel_title
+            last_chap = novel.last_chapter
+            resp      = fetches[fetch_key].result()
+
+            if isinstance(resp, requests.RequestException):
+                print(f"⚠️ Failed to fetch feed for {novel_id}: {resp}")
                 continue
 
-            # compute a chapter timestamp for duration
-            if entry.get("published_parsed"):
-                chap_date = datetime(*entry.published_parsed[:6])
-            elif entry.get("updated_parsed"):
-                chap_date = datetime(*entry.updated_parsed[:6])
-            else:
-                chap_date = datetime.now()
-
-            # ONLY-FREE (series with no paid feed at all)
-            if feed_type == "free" and not novel.get("paid_feed"):
-                if state.get(novel_id, {}).get("only_free_completion"):
-                    print(f"→ skipping {novel_id} (only_free_completion) — already notified")
-                    break
-
-                duration = get_duration(novel.get("start_date", ""), chap_date)
-                msg = build_only_free_completion(novel, chap_field, entry.link, duration)
-                print(f"→ Built message of {len(msg)} characters")
-
-                if safe_send_bot(bot_token, thread_id, msg):
-                    print(f"✔️ Sent only-free completion announcement for {novel_id} → thread {thread_id}")
-                    state.setdefault(novel_id, {})["only_free_completion"] = {
-                        "chapter": chap_field,
-                        "sent_at": datetime.now().isoformat()
-                    }
-                    save_state(state)
-                    commit_state_update(STATE_PATH)
+            hint = refetch_hint(resp, now)
+            if hint != cache.get("do_not_refetch_before"):
+                if hint:
+                    cache["do_not_refetch_before"] = hint
                 else:
-                    print(f"→ Not marking {novel_id} as only_free_completion (send failed)")
-                break
-
-            # PAID completion
-            elif feed_type == "paid":
-                if state.get(novel_id, {}).get("paid_completion"):
-                    print(f"→ skipping {novel_id} (paid_completion) — already notified")
-                    break
+                    cache.pop("do_not_refetch_before", None)
+                dirty = True
 
-                duration = get_duration(novel.get("start_date", ""), chap_date)
-                msg = build_paid_completion(novel, chap_field, entry.link, duration)
-                print(f"→ Built message of {len(msg)} characters")
+            if resp.status_code == 304:
+                print(f"→ {feed_key} for {novel_id} not modified since last run")
+                continue
+            try:
+                resp.raise_for_status()
+            except requests.RequestException as e:
+                print(f"⚠️ Failed to fetch feed for {novel_id}: {e}")
+                continue
 
-                if safe_send_bot(bot_token, thread_id, msg):
-                    print(f"✔️ Sent paid-completion announcement for {novel_id} → thread {thread_id}")
-                    state.setdefault(novel_id, {})["paid_completion"] = {
-                        "chapter": chap_field,
-                        "sent_at": datetime.now().isoformat()
-                    }
-                    save_state(state)
-                    commit_state_update(STATE_PATH)
+            # Validators are only stored once this feed version is fully handled,
+            # so a failed send is retried next run instead of being hidden by a 304.
+            validators = {
+                "etag":          resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+            send_failed = False
+
+            # Raw bytes: feedparser sniffs the encoding from the XML declaration /
+            # Content-Type itself, so requests doesn't need to decode the body first
+            body = resp.content
+            if not feed_may_contain(body, last_chap):
+                entries = []
+                print(f"→ '{last_chap}' not in {feed_key} for {novel_id}; skipped parse")
+            else:
+                entries = scan_rss_items(body, marker_norm)
+                if entries is None:
+                    if fetch_key not in parsed:
+                        import feedparser  # lazy: only feeds the fast path can't scan need it
+                        parsed[fetch_key] = feedparser.parse(
+                            body, response_headers={"content-type": resp.headers.get("Content-Type", "")}
+                        ).entries
+                    entries = parsed[fetch_key]
+                    print(f"Parsing {feed_key} for {novel_id}: {len(entries)} entries")
                 else:
-                    print(f"→ Not marking {novel_id} as paid_completion (send failed)")
-                break
-
-            # STANDARD FREE completion (series that also had a paid feed)
-            elif feed_type == "free":
-                if state.get(novel_id, {}).get("free_completion"):
-                    print(f"→ skipping {novel_id} (free_completion) — already notified")
-                    break
-
-                msg = build_free_completion(novel, chap_field, entry.link)
+                    print(f"Scanned {feed_key} for {novel_id}: {len(entries)} matching item(s)")
+
+            # Search for the last_chapter marker in feed entries (NBSP-insensitive)
+            for entry in entries:
+                chap_field = entry.get("chaptername") or entry.get("chapter", "") or ""
+                if not chapter_matches(chap_field, marker_norm):
+                    continue
+
+                link = entry.get("link", "")
+
+                # Pick the announcement: ONLY-FREE (no paid feed at all), PAID,
+                # or STANDARD FREE (series that also had a paid feed)
+                if feed_type == "free" and not novel.paid_feed:
+                    key, label = "only_free_completion", "only-free completion"
+                    duration   = get_duration(novel.start_date, entry_datetime(entry))
+                    msg        = build_only_free_completion(novel, chap_field, link, duration)
+                elif feed_type == "paid":
+                    key, label = "paid_completion", "paid-completion"
+                    duration   = get_duration(novel.start_date, entry_datetime(entry))
+                    msg        = build_paid_completion(novel, chap_field, link, duration)
+                else:
+                    key, label = "free_completion", "free-completion"
+                    msg        = build_free_completion(novel)
                 print(f"→ Built message of {len(msg)} characters")
 
-                if safe_send_bot(bot_token, thread_id, msg):
-                    print(f"✔️ Sent free-completion announcement for {novel_id} → thread {thread_id}")
-                    state.setdefault(novel_id, {})["free_completion"] = {
-                        "chapter": chap_field,
-                        "sent_at": datetime.now().isoformat()
-                    }
-                    save_state(state)
-                    commit_state_update(STATE_PATH)
+                if send_once(bot_token, thread_id, msg, sent_hashes, now):
+                    print(f"✔️ Sent {label} announcement for {novel_id} → thread {thread_id}")
+                    _mark_sent(state, novel_id, key, chap_field)
+                    dirty = announced = True
                 else:
-                    print(f"→ Not marking {novel_id} as free_completion (send failed)")
+                    print(f"→ Not marking {novel_id} as {key} (send failed)")
+                    send_failed = True
                 break
 
+            if not send_failed:
+                for k, v in validators.items():
+                    if cache.get(k) != v:
+                        if v:
+                            cache[k] = v
+                        else:
+                            cache.pop(k, None)
+                        dirty = True
+
+    # Persist announcements + feed validators / refetch hints once for the whole run
+    flush_state()
+    if announced:
+        commit_state_update(STATE_PATH)
+
 
 if __name__ == "__main__":
     main()
@@ -3,8 +3,9 @@
 """
 new_arc_checker.py (mistmint-discord)
 
-Detects new arcs/worlds and posts a 3-part announcement
-(header, Unlocked list if any, Locked list) into the *per-novel thread*.
+Detects new arcs/worlds and posts an announcement (header carrying the
+Unlocked list if any + Locked list as embeds, then a footer) into the
+*per-novel thread*.
 
 Routing:
   For each novel, resolve a thread id from environment:
@@ -18,16 +19,34 @@ Notes:
 """
 
 import requests
+import atexit
 import feedparser
+import functools
+import hashlib
+import io
 import os
 import json
 import re
+import signal
+import subprocess
 import sys
+import threading
 import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional: faster history encode/decode
+except ImportError:
+    orjson = None
 
 from novel_mappings import (
     HOSTING_SITE_DATA,
-    get_nsfw_novels,  # kept for parity; not used after removing ping header
+    get_nsfw_novels,  # NSFW is still detected (logged), just never pinged
 )
 
 # ─── CONFIG ────────────────────────────────────────────────────────────────────
@@ -37,11 +56,91 @@ NSFW_ROLE_ID  = "<@&1343352825811439616>"  # detected but NOT mentioned
 
 # Only attempt PATCH /channels/{id} if the bot has Manage Threads
 USE_UNARCHIVE = os.getenv("USE_UNARCHIVE", "0") == "1"
+
+# Feeds are fetched concurrently (network-bound) before any novel is processed
+FEED_FETCH_WORKERS = 16
+
+# Set HISTORY_PRETTY=1 to write history files indented (default: compact)
+HISTORY_PRETTY = os.getenv("HISTORY_PRETTY", "0") == "1"
 # ────────────────────────────────────────────────────────────────────────────────
 
 
+# === HTTP SESSION ===
+
+def _make_session() -> requests.Session:
+    """
+    One pooled keep-alive session for feeds + Discord, shared by the novel
+    worker threads, so each host's TLS handshake happens once per run.
+    Transient 5xx/429 are retried with backoff for idempotent methods only
+    (POST is never auto-retried, so an announcement can't be double-posted;
+    its 429s are handled in post_message).
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        backoff_max=4,                     # no single retry sleep longer than this
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=False,  # a long Retry-After must not stall a fetch worker
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _make_session()
+
+# Discord auth goes per request, never on SESSION: it also fetches third-party feeds
+DISCORD_HEADERS = {"Authorization": f"Bot {BOT_TOKEN}", "Content-Type": "application/json"}
+
+# threads the bot is known to be in this run (skips the membership GET)
+_joined_threads = set()
+
+
 # === DISCORD SEND ===
 
+class DiscordRateLimiter:
+    """
+    Client-side sliding windows matching Discord's documented limits
+    (5 messages / 5s per channel, 50 requests / 1s global), so back-to-back
+    posts wait locally instead of collecting 429s. Locked, since novels
+    post from worker threads; the sleep happens outside the lock.
+    """
+
+    def __init__(self, per_channel=(5, 5.0), global_limit=(50, 1.0)):
+        self.per_channel     = per_channel
+        self.global_limit    = global_limit
+        self.channel_history = defaultdict(deque)
+        self.global_history  = deque()
+        self._lock           = threading.Lock()
+
+    @staticmethod
+    def _wait(history: deque, limit: int, window: float, now: float) -> float:
+        while history and now - history[0] >= window:
+            history.popleft()
+        return 0.0 if len(history) < limit else window - (now - history[0])
+
+    def acquire(self, channel_id: str):
+        while True:
+            with self._lock:
+                history = self.channel_history[channel_id]
+                now  = time.monotonic()
+                wait = max(self._wait(history, *self.per_channel, now),
+                           self._wait(self.global_history, *self.global_limit, now))
+                if wait <= 0:
+                    history.append(now)
+                    self.global_history.append(now)
+                    return
+            time.sleep(wait)
+
+
+SEND_LIMITER = DiscordRateLimiter()
+
+# held for a whole announcement (header → footer) in one thread
+_THREAD_SEND_LOCKS = defaultdict(threading.Lock)
+
 def unarchive_thread(bot_token: str, thread_id: str, *, unlock: bool = True, auto_archive_minutes: int = 10080) -> bool:
     url = f"https://discord.com/api/v10/channels/{thread_id}"
     headers = {"Authorization": f"Bot {bot_token}", "Content-Type": "application/json"}
@@ -50,7 +149,7 @@ def unarchive_thread(bot_token: str, thread_id: str, *, unlock: bool = True, aut
         payload["locked"] = False
     if auto_archive_minutes:
         payload["auto_archive_duration"] = auto_archive_minutes  # 60, 1440, 4320, 10080
-    r = requests.patch(url, headers=headers, json=payload, timeout=15)
+    r = SESSION.patch(url, headers=headers, json=payload, timeout=15)
     if not r.ok:
         print(f"⚠️ Unarchive failed {r.status_code}: {r.text}")
     return r.ok
@@ -60,25 +159,28 @@ def ensure_bot_in_thread(bot_token: str, thread_id: str) -> bool:
     try:
         h = {"Authorization": f"Bot {bot_token}"}
         # already a member?
-        r = requests.get(
+        r = SESSION.get(
             f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me",
             headers=h, timeout=15
         )
         if r.status_code == 200:
+            _joined_threads.add(thread_id)
             return True
         # try join
-        j = requests.put(
+        j = SESSION.put(
             f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me",
             headers=h, timeout=15
         )
-        return j.status_code in (200, 204)
+        if j.status_code in (200, 204):
+            _joined_threads.add(thread_id)
+            return True
+        return False
     except requests.RequestException:
         return False
 
 
 def post_message(thread_id: str, content: str, embeds: list | None = None, suppress_embeds: bool = False):
     url = f"https://discord.com/api/v10/channels/{thread_id}/messages"
-    headers = {"Authorization": f"Bot {BOT_TOKEN}", "Content-Type": "application/json"}
     payload = {
         "content": content or "",
         "allowed_mentions": {"parse": []},  # no pings for Mistmint
@@ -88,11 +190,13 @@ def post_message(thread_id: str, content: str, embeds: list | None = None, suppr
     if suppress_embeds:
         payload["flags"] = 4
 
-    # Preflight: join thread (idempotent)
-    ensure_bot_in_thread(BOT_TOKEN, thread_id)
+    # Preflight: join thread (idempotent; once per thread per run)
+    if thread_id not in _joined_threads:
+        ensure_bot_in_thread(BOT_TOKEN, thread_id)
 
     def _send():
-        return requests.post(url, headers=headers, json=payload, timeout=20)
+        SEND_LIMITER.acquire(thread_id)
+        return SESSION.post(url, headers=DISCORD_HEADERS, json=payload, timeout=20)
 
     r = _send()
 
@@ -143,82 +247,189 @@ def post_message(thread_id: str, content: str, embeds: list | None = None, suppr
 
 # === FILE IO (history per novel) ===
 
+# In memory "unlocked"/"locked" are insertion-ordered dicts (title → None):
+# list order, O(1) membership/removal, no duplicates. save_history writes lists.
+
+def _empty_history():
+    return {"unlocked": {}, "locked": {}, "last_announced": ""}
+
 def load_history(history_file):
     """Load arc history JSON; tolerate blank/invalid content."""
     if os.path.exists(history_file):
-        raw = open(history_file, "r", encoding="utf-8").read().strip()
+        with open(history_file, "rb") as f:
+            raw = f.read().strip()
         if not raw:
             print(f"📂 {history_file} empty; init new history")
-            return {"unlocked": [], "locked": [], "last_announced": ""}
+            return _empty_history()
         try:
-            h = json.loads(raw)
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            h = orjson.loads(raw) if orjson is not None else json.loads(raw)
         except json.JSONDecodeError:
             print(f"📂 {history_file} invalid JSON; init new history")
-            h = {"unlocked": [], "locked": [], "last_announced": ""}
-        h.setdefault("unlocked", [])
-        h.setdefault("locked", [])
+            h = _empty_history()
+        h["unlocked"] = dict.fromkeys(h.get("unlocked") or ())
+        h["locked"]   = dict.fromkeys(h.get("locked") or ())
         h.setdefault("last_announced", "")
         print(f"📂 Loaded {history_file}: {len(h['unlocked'])} unlocked, {len(h['locked'])} locked, last={h['last_announced']}")
         return h
     print(f"📂 No {history_file}; init new history")
-    return {"unlocked": [], "locked": [], "last_announced": ""}
+    return _empty_history()
+
+# novels are processed concurrently; saves and git both run under this lock
+_GIT_LOCK = threading.Lock()
 
 def save_history(history, history_file):
     print(f"📂 Saving {history_file} (unlocked={len(history['unlocked'])}, locked={len(history['locked'])}, last={history['last_announced']})")
-    with open(history_file, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=4, ensure_ascii=False)
+    # write-then-rename: the arc job cancels in-progress runs, which must not tear the file
+    out = {**history, "unlocked": list(history["unlocked"]), "locked": list(history["locked"])}
+    if orjson is not None:
+        data = orjson.dumps(out, option=orjson.OPT_INDENT_2 if HISTORY_PRETTY else 0)
+    elif HISTORY_PRETTY:
+        data = json.dumps(out, indent=2, ensure_ascii=False).encode("utf-8")
+    else:
+        data = json.dumps(out, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    tmp = f"{history_file}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, history_file)
     print(f"✅ Saved {history_file}")
 
-def commit_history_update(history_file):
-    print(f"📌 Commit {history_file}…")
-    os.system("git config --global user.name 'GitHub Actions'")
-    os.system("git config --global user.email 'actions@github.com'")
-    os.system(f"git add {history_file}")
-    changed = os.system("git diff --staged --quiet")
-    if changed != 0:
-        os.system(f"git commit -m 'Auto-update: {history_file}'")
+_git_identity_set = False
+
+def _git(*args):
+    """Run one git command without a shell; returns the exit code (stderr logged on failure)."""
+    r = subprocess.run(["git", *args], capture_output=True, text=True)
+    if r.returncode != 0 and r.stderr.strip():
+        print(f"⚠️ git {args[0]}: {r.stderr.strip()}", file=sys.stderr)
+    return r.returncode
+
+def _ensure_git_identity():
+    """Fall back to the Actions identity via GIT_* env (no ~/.gitconfig writes)."""
+    global _git_identity_set
+    if _git_identity_set:
+        return
+    if _git("config", "user.email") != 0:
+        for role in ("AUTHOR", "COMMITTER"):
+            os.environ.setdefault(f"GIT_{role}_NAME", "GitHub Actions")
+            os.environ.setdefault(f"GIT_{role}_EMAIL", "actions@github.com")
+    _git_identity_set = True
+
+# history files saved this run; committed together at exit
+_dirty_histories = set()
+
+def mark_history_dirty(history, history_file):
+    """
+    Save now (a cancelled run must not forget an arc it already posted),
+    and queue the file for the single commit in flush_histories.
+    """
+    with _GIT_LOCK:
+        save_history(history, history_file)
+        _dirty_histories.add(history_file)
+    print(f"📌 Queued {history_file}")
+
+def flush_histories():
+    """One git add/commit/push for every history saved this run (idempotent)."""
+    with _GIT_LOCK:
+        if not _dirty_histories:
+            return
+        files = sorted(_dirty_histories)
+        _dirty_histories.clear()
+        print(f"📌 Commit {', '.join(files)}…")
+        _ensure_git_identity()
+        if _git("add", *files) != 0:
+            print(f"❌ git add failed; arc history NOT persisted: {', '.join(files)}", file=sys.stderr)
+            return
+        if _git("diff", "--staged", "--quiet") == 0:
+            print("ℹ️ No changes")
+            return
+        if _git("commit", "-m", f"Auto-update: {', '.join(files)}") != 0:
+            print(f"❌ git commit failed; arc history NOT persisted: {', '.join(files)}", file=sys.stderr)
+            return
         print("✅ Committed")
-    else:
-        print("ℹ️ No changes")
-    if os.system("git push origin main") != 0:
-        print("❌ Push failed; retry --force")
-        os.system("git push origin main --force")
+        # this push is the only thing that keeps last_announced between runs
+        if _git("push", "origin", "main") != 0:
+            print("❌ Push failed; retry --force")
+            if _git("push", "origin", "main", "--force") != 0:
+                print(f"❌ Force push failed too; arc history NOT persisted, "
+                      f"next run may repost: {', '.join(files)}", file=sys.stderr)
+                return
+        print("✅ Pushed")
 
 
 # === UTIL ===
 
+# Compiled once at import. Stdlib re on purpose: these rely on Unicode \d/\s
+# (full-width digits, NBSP), which RE2's ASCII classes would not match.
+_RE_STORED_TITLE    = re.compile(r"(【Arc\s+\d+】)\s*(.*)")
+_RE_ARC_NUM         = re.compile(r"【Arc\s*(\d+)】")
+_RE_TAIL_ONE        = re.compile(r"(?:\s+001|\(1\)|\.\s*1)$")
+_RE_NUM_PREFIX      = re.compile(r"^.*?\d+[^\w\s]*\s*")
+_RE_SHORTCODE       = re.compile(r"[^A-Z0-9]+")
+_RE_STRIP_ARC_TAG   = re.compile(r"^【Arc\s*\d+】")
+_RE_NEW_MARKER_TAIL = re.compile(r"(?:001|\(1\)|\.\s*1)\**\s*$")
+_RE_VOL_PREFIX      = re.compile(r"(?i)^(?:arc|world|plane|story|volume|vol|v)\s*\d+")
+
+_NBSP_TO_SPACE = str.maketrans({"\u00A0": " "})
+
+def _norm(s):
+    """None-safe NBSP → space + strip, in one translate pass."""
+    return (s or "").translate(_NBSP_TO_SPACE).strip()
+
 def clean_feed_title(raw_title):
     return (raw_title or "").replace("*", "").strip()
 
 def format_stored_title(title):
-    m = re.match(r"(【Arc\s+\d+】)\s*(.*)", title or "")
+    m = _RE_STORED_TITLE.match(title or "")
     return f"**{m.group(1)}**{m.group(2)}" if m else f"**{title}**"
 
 def extract_arc_number(title):
-    m = re.search(r"【Arc\s*(\d+)】", title or "")
+    if not title or "【Arc" not in title:
+        return None
+    m = _RE_ARC_NUM.search(title)
     return int(m.group(1)) if m else None
 
-def deduplicate(lst):
-    seen, out = set(), []
-    for x in lst:
-        if x not in seen:
-            seen.add(x); out.append(x)
-    return out
+def _strip_arc_tag(t: str) -> str:
+    # literal prefix check first; only tagged titles pay for the regex
+    return _RE_STRIP_ARC_TAG.sub("", t) if t.startswith("【Arc") else t
+
+@functools.lru_cache(maxsize=1)
+def nsfw_titles() -> frozenset:
+    """get_nsfw_novels() once per run, as a set for O(1) membership."""
+    return frozenset(get_nsfw_novels() or ())
 
 def nsfw_detected(feed_entries, novel_title):
+    needle = (novel_title or "").lower()
     for e in feed_entries:
-        if (novel_title or "").lower() in (e.get("title") or "").lower() and "nsfw" in (e.get("category","") or "").lower():
+        # category first: it is short, often absent, and rarely NSFW
+        cat = e.get("category")
+        if cat and "nsfw" in cat.lower() and needle in (e.get("title") or "").lower():
             print(f"⚠️ NSFW in entry: {e.get('title')}")
             return True
     return False
 
 def extract_arc_title(nameextend):
     clean = (nameextend or "").strip("* ").strip()
-    clean = re.sub(r"(?:\s+001|\(1\)|\.\s*1)$", "", clean).strip()
+    clean = _RE_TAIL_ONE.sub("", clean).strip()
     return clean
 
 def strip_any_number_prefix(s: str) -> str:
-    return re.sub(r"^.*?\d+[^\w\s]*\s*", "", s or "")
+    return _RE_NUM_PREFIX.sub("", s or "")
+
+# Helpers to identify “first chapter of a new arc” (pure, str-only inputs;
+# cached because chapter labels like "001" / "Arc 2" repeat across entries)
+@functools.lru_cache(maxsize=4096)
+def is_new_marker(raw: str):
+    if not raw: return False
+    raw = raw.strip()
+    # plain endings are the common case; the regex covers "*" / ". 1" variants
+    return raw.endswith(("001", "(1)", ".1")) or bool(_RE_NEW_MARKER_TAIL.search(raw))
+
+@functools.lru_cache(maxsize=4096)
+def looks_like_arc_start(raw_vol: str, raw_chap: str, raw_extend: str):
+    rv, rc, rext = (raw_vol or "").strip(), (raw_chap or "").strip(), (raw_extend or "").strip()
+    # an "N.N" extend with a volume prefix and a plain volume prefix both
+    # count, so the d.d form never changes the answer: one match per field
+    return is_new_marker(rext) or is_new_marker(rc) or bool(_RE_VOL_PREFIX.match(rv))
 
 def next_arc_number(history):
     n = extract_arc_number(history.get("last_announced", ""))
@@ -242,14 +453,16 @@ DIGIT_EMOJI = {
     '8': '<:9891_eight_emj_png:1368137290517581995>',
     '9': '<:1898_nine_emj_png:1368137143196717107>',
 }
+_DIGIT_TRANSLATE = str.maketrans(DIGIT_EMOJI)
+
 def number_to_emoji(n: int) -> str:
-    return ''.join(DIGIT_EMOJI[d] for d in str(n))
+    return str(n).translate(_DIGIT_TRANSLATE)
 
 
 # === THREAD RESOLUTION (shortcode → env) ===
 
 def sanitize_shortcode_from_title(title: str) -> str:
-    return re.sub(r"[^A-Z0-9]+", "_", (title or "").upper()).strip("_")
+    return _RE_SHORTCODE.sub("_", (title or "").upper()).strip("_")
 
 def resolve_thread_id(novel_title: str, details: dict) -> str | None:
     sc = (details.get("short_code") or "").strip()
@@ -263,60 +476,211 @@ def resolve_thread_id(novel_title: str, details: dict) -> str | None:
     return val
 
 
+# === FEED READ ===
+
+_ITEM_FIELDS = ("title", "volume", "nameextend", "chaptername", "category")
+
+def scan_arc_items(raw_xml: bytes) -> list[dict] | None:
+    """
+    Fast path for plain RSS 2.0: stream <item>s with ElementTree (expat) and
+    keep only the fields arc detection reads. Entries are shaped like
+    feedparser's (missing tag → key absent). Returns None when the body
+    isn't plain well-formed RSS — the caller then falls back to feedparser.
+    """
+    entries, seen_item = [], False
+    try:
+        for _, el in ET.iterparse(io.BytesIO(raw_xml)):
+            if el.tag != "item":
+                continue
+            seen_item = True
+            e = {}
+            for tag in _ITEM_FIELDS:
+                text = el.findtext(tag)
+                if text is not None:
+                    e[tag] = text.strip()
+            entries.append(e)
+            el.clear()
+    except ET.ParseError:
+        return None
+    return entries if seen_item else None
+
+def read_feed(url: str, etag: str | None = None, modified: str | None = None):
+    """
+    Conditional GET + parse. Returns a FeedParserDict with status, entries
+    and (on 200) the etag/modified validators, so callers treat it exactly
+    like a feedparser.parse(url, etag=..., modified=...) result.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    try:
+        resp = SESSION.get(url, headers=headers, timeout=20)
+    except requests.RequestException as e:
+        print(f"⚠️ Feed fetch failed {url}: {e}", file=sys.stderr)
+        return feedparser.FeedParserDict(entries=[])
+    if resp.status_code == 304:
+        return feedparser.FeedParserDict(status=304, entries=[])
+    if not resp.ok:
+        print(f"⚠️ Feed HTTP {resp.status_code}: {url}", file=sys.stderr)
+        return feedparser.FeedParserDict(status=resp.status_code, entries=[])
+
+    entries = scan_arc_items(resp.content)
+    if entries is None:
+        entries = feedparser.parse(
+            resp.content, response_headers={"content-type": resp.headers.get("Content-Type", "")}
+        ).entries
+    return feedparser.FeedParserDict(
+        status=resp.status_code,
+        entries=entries,
+        etag=resp.headers.get("ETag"),
+        modified=resp.headers.get("Last-Modified"),
+    )
+
+
 # === CORE ARC DETECTION ===
 
-def process_arc(novel, thread_id: str):
+UNLOCKED_LABEL = "<a:5693pinkwings:1368138669004820500> `Unlocked 🔓` <a:5046_bounce_pink:1368138460027813888>"
+LOCKED_LABEL   = "<a:5693pinkwings:1368138669004820500> `Locked 🔐` <a:5046_bounce_pink:1368138460027813888>"
+
+# Discord rejects a message whose embeds hold more than 6000 characters in
+# total, more than 10 embeds, or any embed description over 4096 characters
+EMBED_TOTAL_LIMIT       = 6000
+EMBED_MAX_PER_MESSAGE   = 10
+EMBED_DESCRIPTION_LIMIT = 4096
+
+PINK_DIAMOND_BORDER = "<:pinkdiamond_border:1365575603734183936>" * 6
+
+ARC_HEADER_TEMPLATE = (
+    "## <a:announcement:1365566215975731274> NEW ARC ALERT "
+    "<a:pinksparkles:1365566023201198161>"
+    "<a:Butterfly:1365572264774471700>"
+    "<a:pinksparkles:1365566023201198161>\n"
+    "***<:babypinkarrowleft:1365566594503147550>"
+    "<:world_01:1368202193038999562>"
+    "<:world_02:1368202204468613162> {world_emoji}"
+    "<:babypinkarrowright:1365566635838275595>is Live for*** "
+    "<a:pinkloading:1365566815736172637>\n"
+    # <url>: no link preview, so the message needs no SUPPRESS_EMBEDS
+    # flag and can carry the arc-list embeds itself
+    "### [{title}](<{link}>) "
+    "<a:Turtle_Police:1365223650466205738>\n"
+    "❀° ┄───────────────────────╮"
+)
+
+ARC_FOOTER_TEMPLATE = (
+    "╰───────────────────────┄ °❀\n"
+    "> *Advance access is ready for you on {host}! "
+    "<a:holo_diamond:1365566087277711430>*\n"
+    + PINK_DIAMOND_BORDER
+)
+
+def list_embeds(label: str, lines, color: int, spoiler: bool = False) -> list:
+    """
+    One arc list as embeds, cut between whole lines so no description passes
+    EMBED_DESCRIPTION_LIMIT. The label heads the first embed; with spoiler
+    each chunk gets its own ||…|| pair.
+    """
+    wrap   = "||{}||" if spoiler else "{}"
+    budget = EMBED_DESCRIPTION_LIMIT - (len(wrap) - 2)
+    chunks, chunk, size = [], [], len(label)   # size counts the "\n" before each line
+    for line in lines:
+        if chunk and size + 1 + len(line) > budget:
+            chunks.append(chunk)
+            chunk, size = [], -1
+        chunk.append(line)
+        size += 1 + len(line)
+    chunks.append(chunk)
+    embeds = [{"description": wrap.format("\n".join(c)), "color": color} for c in chunks]
+    embeds[0]["description"] = f"{label}\n{embeds[0]['description']}"
+    return embeds
+
+def pack_embeds(embeds) -> list:
+    """Group embeds, in order, into messages that each stay within Discord's per-message limits."""
+    groups, size = [], 0
+    for e in embeds:
+        n = len(e["description"])
+        if not groups or size + n > EMBED_TOTAL_LIMIT or len(groups[-1]) >= EMBED_MAX_PER_MESSAGE:
+            groups.append([])
+            size = 0
+        groups[-1].append(e)
+        size += n
+    return groups
+
+def entries_digest(*entry_lists) -> str:
+    """
+    Hash of the fields arc detection reads, over a novel's matched entries.
+    Covers feeds that send no ETag/Last-Modified: same digest, same result.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    for entries in entry_lists:
+        for e in entries:
+            for tag in ("volume", "nameextend", "chaptername"):
+                h.update((e.get(tag) or "").encode("utf-8"))
+                h.update(b"\x1f")
+            h.update(b"\x1e")
+        h.update(b"\x1d")
+    return h.hexdigest()
+
+def feed_key(novel, history, side: str) -> tuple:
+    """(url, etag, modified) for one side; also the prefetch dedupe key."""
+    return (
+        novel[f"{side}_feed"],
+        history.get(f"{side}_etag") or None,
+        history.get(f"{side}_modified") or None,
+    )
+
+def prefetch_feeds(keys) -> dict:
+    """Fetch every distinct (url, etag, modified) once, all in parallel."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(FEED_FETCH_WORKERS, len(keys))) as ex:
+        return dict(zip(keys, ex.map(lambda k: read_feed(*k), keys)))
+
+def process_arc(novel, thread_id: str, history: dict, free_feed, paid_feed):
     print(f"\n=== Processing novel: {novel['novel_title']} → thread {thread_id} ===")
     history_changed = False
+    history_file = novel["history_file"]
+
+    # An unchanged feed only means "nothing to do" when no locked arc is
+    # still waiting for its announcement; otherwise fall through so the
+    # announce step below gets to (re)try it
+    pending = bool(history["locked"]) and next(reversed(history["locked"])) != history.get("last_announced", "")
 
-    # 0. Fetch feeds
-    free_feed = feedparser.parse(novel["free_feed"])
-    paid_feed = feedparser.parse(novel["paid_feed"])
+    # 1. Feeds were prefetched conditionally on the history's validators
+    if free_feed.get("status") == 304 and paid_feed.get("status") == 304 and not pending:
+        print("ℹ️ Both feeds unchanged (304). Done.")
+        return
     print(f"🌐 Fetched: {len(free_feed.entries)} free, {len(paid_feed.entries)} paid")
 
-    # 1. NSFW (detected but not pinged)
+    # new validators only reach disk with a save, and never cause one: the
+    # history is committed, so an ETag-only change must not push a commit.
+    # They ride along when the arcs themselves change; until then (or after
+    # a failed announcement) the next run simply refetches in full
+    for side, feed in (("free", free_feed), ("paid", paid_feed)):
+        for attr in ("etag", "modified"):
+            val = feed.get(attr)
+            if val:
+                history[f"{side}_{attr}"] = val
+
+    # 2. NSFW (detected but not pinged)
     is_nsfw = (
-        novel["novel_title"] in get_nsfw_novels()
-        or nsfw_detected(free_feed.entries + paid_feed.entries, novel["novel_title"])
+        novel["novel_title"] in nsfw_titles()
+        or nsfw_detected(chain(free_feed.entries, paid_feed.entries), novel["novel_title"])
     )
     print(f"🕵️ NSFW={is_nsfw}")
 
-    # 2. Load history
-    history_file = novel.get("history_file")
-    if not history_file:
-        print(f"⚠️ No history_file for '{novel['novel_title']}', skipping.")
-        return
-    history = load_history(history_file)
-
     had_locked_before   = bool(history["locked"])
     had_unlocked_before = bool(history["unlocked"])
 
-    # Helpers to identify “first chapter of a new arc”
-    def is_new_marker(raw: str):
-        if not raw: return False
-        raw = raw.strip()
-        return bool(re.search(r"(001|\(1\)|\.\s*1)(\*+)?\s*$", raw))
-
-    def looks_like_arc_start(raw_vol: str, raw_chap: str, raw_extend: str):
-        rv, rc, rext = (raw_vol or "").strip(), (raw_chap or "").strip(), (raw_extend or "").strip()
-        if is_new_marker(rext) or is_new_marker(rc):
-            return True
-        if re.match(r"^\**\s*\d+\.\d+\s*\**$", rext):
-            if re.match(r"(?i)^(arc|world|plane|story|volume|vol|v)\s*\d+", rv):
-                return True
-        if re.match(r"(?i)^(arc|world|plane|story|volume|vol|v)\s*\d+", rv):
-            if not is_new_marker(rext) and not re.match(r"^\**\s*\d+\.\d+\s*\**$", rext):
-                return True
-        return False
-
-    def extract_new_bases(feed, current_title):
+    def extract_new_bases(entries, skip=frozenset()):
         bases = []
-        for e in feed.entries:
-            if (e.get("title") or "").strip() != current_title:
-                continue
-            raw_vol    = (e.get("volume") or "").replace("\u00A0", " ").strip()
-            raw_extend = (e.get("nameextend") or "").replace("\u00A0", " ").strip()
-            raw_chap   = (e.get("chaptername") or "").replace("\u00A0", " ").strip()
+        for e in entries:
+            raw_vol    = _norm(e.get("volume"))
+            raw_extend = _norm(e.get("nameextend"))
+            raw_chap   = _norm(e.get("chaptername"))
             if not looks_like_arc_start(raw_vol, raw_chap, raw_extend):
                 continue
             if raw_vol:
@@ -326,84 +690,103 @@ def process_arc(novel, thread_id: str):
             else:
                 base = raw_chap
             base = strip_any_number_prefix(base)
+            if base in skip:
+                continue
             bases.append(base)
         return bases
 
-    free_new = extract_new_bases(free_feed, novel["novel_title"])
-    paid_new = extract_new_bases(paid_feed, novel["novel_title"])
+    # one title filter per feed; everything below only sees this novel's entries
+    target = (novel["novel_title"] or "").strip()
+    free_matches = [e for e in free_feed.entries if (e.get("title") or "").strip() == target]
+    paid_matches = [e for e in paid_feed.entries if (e.get("title") or "").strip() == target]
+    if not free_matches and not paid_matches:
+        print("ℹ️ No feed entries for this novel.")
+
+    # only full bodies (both sides 200) are comparable to the stored digest;
+    # like the validators it is saved with real history changes, never alone
+    if free_feed.get("status") == 200 and paid_feed.get("status") == 200:
+        digest = entries_digest(free_matches, paid_matches)
+        if digest == history.get("entries_digest") and not pending:
+            print("ℹ️ Feed entries unchanged since last save. Done.")
+            return
+        history["entries_digest"] = digest
+
+    # bases already numbered in either list; kept current as arcs are added
+    seen_bases = {_strip_arc_tag(t) for t in history["unlocked"]}
+    seen_bases.update(_strip_arc_tag(t) for t in history["locked"])
+
+    # a known free base may still unlock a locked arc, so only the paid side
+    # can drop already-numbered bases up front
+    free_new = extract_new_bases(free_matches)
+    paid_new = extract_new_bases(paid_matches, skip=frozenset(seen_bases))
     print(f"🔍 New bases: free={len(free_new)}, paid={len(paid_new)}")
 
     # 3. Update history
     free_created, paid_created = False, False
 
-    # free side
+    # free side: exact base hits come from an index; anything else falls
+    # back to the suffix scan over arcs that are still locked
+    locked_by_base = {}
+    for full in history["locked"]:
+        locked_by_base.setdefault(_strip_arc_tag(full), full)
     for base in free_new:
-        matched_locked = False
-        for full in history["locked"][:]:
-            if full.endswith(base):
-                matched_locked = True
-                history["locked"].remove(full)
-                if full not in history["unlocked"]:
-                    history["unlocked"].append(full)
-                history_changed = True
-                print(f"🔓 Unlocked arc: {full}")
-                break
-        if not matched_locked:
-            seen_bases = [re.sub(r"^【Arc\s*\d+】", "", t) for t in (history["unlocked"] + history["locked"])]
+        full = locked_by_base.pop(base, None)
+        if full is None or full not in history["locked"]:
+            full = next((f for f in history["locked"] if f.endswith(base)), None)
+        if full is not None:
+            del history["locked"][full]
+            history["unlocked"].setdefault(full)  # keeps its slot if already unlocked
+            history_changed = True
+            print(f"🔓 Unlocked arc: {full}")
+        else:
             if base not in seen_bases:
                 n = next_arc_number(history)
                 full = f"【Arc {n}】{base}"
-                history["unlocked"].append(full)
+                history["unlocked"][full] = None
+                seen_bases.add(base)
                 free_created = True
                 history_changed = True
                 print(f"🌿 Brand-new free arc: {full}")
 
     # paid side
-    seen_bases = [re.sub(r"^【Arc\s*\d+】", "", f) for f in (history["unlocked"] + history["locked"])]
     for base in paid_new:
         if base not in seen_bases:
             n = next_arc_number(history)
             full = f"【Arc {n}】{base}"
-            history["locked"].append(full)
+            history["locked"][full] = None
+            seen_bases.add(base)
             paid_created = True
             history_changed = True
             print(f"🔐 New locked arc: {full}")
 
-    # dedupe
-    history["unlocked"] = deduplicate(history["unlocked"])
-    history["locked"]   = deduplicate(history["locked"])
-
     # 3.5 Bootstrap: if first-ever run created entries, save numbering only
     first_run = (not had_locked_before and not had_unlocked_before)
     if first_run and (free_created or paid_created):
         if history["locked"]:
-            history["last_announced"] = history["locked"][-1]
+            history["last_announced"] = next(reversed(history["locked"]))
             print(f"🌱 Bootstrap: last_announced = {history['last_announced']}")
-        save_history(history, history_file)
-        commit_history_update(history_file)
+        mark_history_dirty(history, history_file)
         return
 
     # Special-case exits
     if free_created and not paid_created and not history["locked"]:
         print("🌱 First arc started FREE; save numbering only.")
-        save_history(history, history_file); commit_history_update(history_file); return
+        mark_history_dirty(history, history_file); return
     if paid_created and not free_created and not had_locked_before and not had_unlocked_before:
         print("💸 First arc started PAID-only; save numbering only.")
-        save_history(history, history_file); commit_history_update(history_file); return
+        mark_history_dirty(history, history_file); return
 
     # if no locked arcs, nothing to hype
     if not history["locked"]:
         if history_changed:
-            save_history(history, history_file)
-            commit_history_update(history_file)
+            mark_history_dirty(history, history_file)
         print("ℹ️ No locked arcs. Done.")
         return
 
-    new_full = history["locked"][-1]
+    new_full = next(reversed(history["locked"]))
     if new_full == history.get("last_announced", ""):
         if history_changed:
-            save_history(history, history_file)
-            commit_history_update(history_file)
+            mark_history_dirty(history, history_file)
         print(f"✅ Already announced: {new_full}")
         return
 
@@ -414,84 +797,72 @@ def process_arc(novel, thread_id: str):
     unlocked_list = history["unlocked"]
     locked_list   = history["locked"]
 
-    unlocked_md = "\n".join(format_stored_title(t) for t in unlocked_list) if unlocked_list else ""
-    locked_lines = [format_stored_title(t) for t in locked_list]
-    locked_lines = deduplicate(locked_lines)
+    # dict-backed lists hold no duplicates; format each title once
+    unlocked_lines = list(map(format_stored_title, unlocked_list))
+    locked_lines   = list(map(format_stored_title, locked_list))
     if locked_lines:
         locked_lines[-1] = f"<a:9410pinkarrow:1368139217556996117>{locked_lines[-1]}"
-    locked_md = "\n".join(locked_lines) if locked_lines else "None"
 
     # 4. Build messages (no pings, no role-react footer)
-    content_header = (
-        "## <a:announcement:1365566215975731274> NEW ARC ALERT "
-        "<a:pinksparkles:1365566023201198161>"
-        "<a:Butterfly:1365572264774471700>"
-        "<a:pinksparkles:1365566023201198161>\n"
-        f"***<:babypinkarrowleft:1365566594503147550>"
-        f"<:world_01:1368202193038999562>"
-        f"<:world_02:1368202204468613162> {world_emoji}"
-        f"<:babypinkarrowright:1365566635838275595>is Live for*** "
-        "<a:pinkloading:1365566815736172637>\n"
-        f"### [{novel['novel_title']}]({novel['novel_link']}) "
-        "<a:Turtle_Police:1365223650466205738>\n"
-        "❀° ┄───────────────────────╮"
+    content_header = ARC_HEADER_TEMPLATE.format(
+        world_emoji=world_emoji, title=novel["novel_title"], link=novel["novel_link"],
     )
 
-    embed_unlocked = None
-    if unlocked_md:
-        embed_unlocked = {"description": unlocked_md, "color": 0xFFF9BF}
+    # both lists ride on the header message; each list carries its own label
+    embeds = []
+    if unlocked_lines:
+        embeds += list_embeds(UNLOCKED_LABEL, unlocked_lines, 0xFFF9BF)
+    embeds += list_embeds(LOCKED_LABEL, locked_lines or ["None"], 0xA87676, spoiler=True)
 
-    embed_locked = {"description": f"||{locked_md}||", "color": 0xA87676}
+    # long histories overflow the per-message embed budget: then the header
+    # goes alone and the lists follow in as many messages as they need
+    embed_groups = pack_embeds(embeds)
+    lists_inline = len(embed_groups) == 1
 
-    footer_and_react = (
-        "╰───────────────────────┄ °❀\n"
-        f"> *Advance access is ready for you on {novel['host']}! "
-        "<a:holo_diamond:1365566087277711430>*\n"
-        + "<:pinkdiamond_border:1365575603734183936>" * 6
-    )
+    footer_and_react = ARC_FOOTER_TEMPLATE.format(host=novel["host"])
 
-    # 5. Send to thread
+    # 5. Send to thread; one announcement at a time per thread, so novels
+    #    sharing a thread never interleave their header and footer
     header_ok = False
-    try:
-        # Preflight: join; unarchive only when allowed
-        ensure_bot_in_thread(BOT_TOKEN, thread_id)
-        if USE_UNARCHIVE:
-            unarchive_thread(BOT_TOKEN, thread_id, unlock=True, auto_archive_minutes=10080)
-    
-        post_message(thread_id, content_header, suppress_embeds=True)
-        header_ok = True
-        print(f"✅ Header sent: {new_full}")
-    except requests.RequestException as e:
-        print(f"⚠️ Header send failed: {e}", file=sys.stderr)
-
-    if embed_unlocked:
+    with _THREAD_SEND_LOCKS[thread_id]:
         try:
-            post_message(thread_id, "<a:5693pinkwings:1368138669004820500> `Unlocked 🔓` <a:5046_bounce_pink:1368138460027813888>",
-                         embeds=[embed_unlocked])
-            print("✅ Unlocked embed sent")
+            # Preflight: join; unarchive only when allowed
+            ensure_bot_in_thread(BOT_TOKEN, thread_id)
+            if USE_UNARCHIVE:
+                unarchive_thread(BOT_TOKEN, thread_id, unlock=True, auto_archive_minutes=10080)
+
+            if not unlocked_lines:
+                print("ℹ️ No unlocked arcs block.")
+            # embeds render below content, so header + lists is one message;
+            # the footer has to follow them, so it stays a second one
+            if lists_inline:
+                post_message(thread_id, content_header, embeds=embeds)
+                print(f"✅ Header + arc lists sent: {new_full}")
+            else:
+                post_message(thread_id, content_header)
+                print(f"✅ Header sent: {new_full}")
+            header_ok = True
         except requests.RequestException as e:
-            print(f"⚠️ Unlocked send failed: {e}", file=sys.stderr)
-    else:
-        print("ℹ️ No unlocked arcs block.")
+            print(f"⚠️ Header send failed: {e}", file=sys.stderr)
 
-    try:
-        post_message(thread_id, "<a:5693pinkwings:1368138669004820500> `Locked 🔐` <a:5046_bounce_pink:1368138460027813888>",
-                     embeds=[embed_locked])
-        print("✅ Locked embed sent")
-    except requests.RequestException as e:
-        print(f"⚠️ Locked send failed: {e}", file=sys.stderr)
+        if not lists_inline:
+            for group in embed_groups:
+                try:
+                    post_message(thread_id, "", embeds=group)
+                    print(f"✅ Arc list message sent ({len(group)} embed(s))")
+                except requests.RequestException as e:
+                    print(f"⚠️ Arc list send failed: {e}", file=sys.stderr)
 
-    try:
-        post_message(thread_id, footer_and_react, suppress_embeds=True)
-        print("✅ Footer sent")
-    except requests.RequestException as e:
-        print(f"⚠️ Footer send failed: {e}", file=sys.stderr)
+        try:
+            post_message(thread_id, footer_and_react, suppress_embeds=True)
+            print("✅ Footer sent")
+        except requests.RequestException as e:
+            print(f"⚠️ Footer send failed: {e}", file=sys.stderr)
 
     # 6. Record announcement
     if header_ok:
         history["last_announced"] = new_full
-        save_history(history, history_file)
-        commit_history_update(history_file)
+        mark_history_dirty(history, history_file)
         print(f"📌 Recorded last_announced = {new_full}")
     else:
         print("⚠️ Skipped updating last_announced (header failed).")
@@ -499,6 +870,13 @@ def process_arc(novel, thread_id: str):
 
 # === LOAD & RUN ===
 if __name__ == "__main__":
+    # also covers an exception mid-run: histories already queued still land.
+    # A cancelled Actions run gets SIGTERM, which skips atexit unless it is
+    # turned into a normal exit first
+    atexit.register(flush_histories)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    tasks = []
     for host, host_data in (HOSTING_SITE_DATA or {}).items():
         if host != HOST_TARGET:
             continue
@@ -520,4 +898,25 @@ if __name__ == "__main__":
                 "novel_link":       d.get("novel_url", ""),
                 "history_file":     d.get("history_file", ""),
             }
-            process_arc(novel, thread_id)
+            if not novel["history_file"]:
+                print(f"⚠️ No history_file for '{title}', skipping.")
+                continue
+            # history carries the feeds' ETag/Last-Modified for the prefetch
+            tasks.append((novel, thread_id, load_history(novel["history_file"])))
+
+    # every novel's free+paid feed in flight at once; shared feeds fetch once
+    feeds = prefetch_feeds(feed_key(n, h, side) for n, _, h in tasks for side in ("free", "paid"))
+
+    def run(task):
+        novel, thread_id, history = task
+        process_arc(novel, thread_id, history,
+                    feeds[feed_key(novel, history, "free")],
+                    feeds[feed_key(novel, history, "paid")])
+
+    if tasks:
+        # warm the NSFW set on this thread: lru_cache doesn't stop concurrent
+        # first callers from each running get_nsfw_novels()
+        nsfw_titles()
+        with ThreadPoolExecutor(max_workers=min(8, len(tasks))) as ex:
+            list(ex.map(run, tasks))
+    flush_histories()
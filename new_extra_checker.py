@@ -192,8 +192,11 @@ def load_state(path=STATE_PATH):
         return {}
 
 def save_state(state, path=STATE_PATH):
-    with open(path, "w", encoding="utf-8") as f:
+    # write-then-rename so an interrupted run can't leave a truncated state.json
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
 
 
 # ─── HELPERS ───────────────────────────────────────────────────────────────────
@@ -33,6 +33,7 @@ Notes:
 """
 
 import argparse
+import atexit
 import json
 import os
 import sys
@@ -41,9 +42,17 @@ import html
 import feedparser
 import requests
 from datetime import datetime, timezone
+from typing import NamedTuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import subprocess
 import time
 
+try:
+    import orjson  # optional: faster state.json decode/encode
+except ImportError:
+    orjson = None
+
 from novel_mappings import (
     HOSTING_SITE_DATA,
     get_nsfw_novels,  # kept for parity; not used after removing ping header
@@ -64,6 +73,29 @@ MISTMINT_GUILD_ID = "1379303379221614702"
 # ───────────────────────────────────────────────────────────────────────────────
 
 
+# ─── HTTP SESSION ──────────────────────────────────────────────────────────────
+def _make_session() -> requests.Session:
+    """
+    One keep-alive session for the feed + Discord calls, so each host's TLS
+    handshake happens once per run. Transient 5xx/429 are retried with backoff
+    for idempotent methods only (the announcement POST is never auto-retried).
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _make_session()
+
+
 def commit_state_update(path=STATE_PATH):
     """Commit/push state.json so the skip flag survives the next run."""
     try:
@@ -82,13 +114,14 @@ def commit_state_update(path=STATE_PATH):
 
 def load_state(path=STATE_PATH):
     try:
-        with open(path, encoding="utf-8") as f:
+        with open(path, "rb") as f:
             raw = f.read().strip()
             if not raw:
                 # empty file → treat as empty state
                 return {}
             try:
-                return json.loads(raw)
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                return orjson.loads(raw) if orjson is not None else json.loads(raw)
             except json.JSONDecodeError:
                 # malformed JSON → ignore and start fresh in-memory
                 print(f"⚠️ {path} contained invalid JSON; using empty state.", file=sys.stderr)
@@ -98,8 +131,15 @@ def load_state(path=STATE_PATH):
 
 
 def save_state(state, path=STATE_PATH):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, ensure_ascii=False)
+    # write-then-rename so an interrupted run can't leave a truncated state.json
+    if orjson is not None:
+        data = orjson.dumps(state, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(state, indent=2, ensure_ascii=False).encode("utf-8")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
 
 
 def parsed_time_to_aware(struct_t, fallback_now):
@@ -127,7 +167,7 @@ def unarchive_thread(bot_token: str, thread_id: str, *, unlock: bool = True, aut
         payload["locked"] = False
     if auto_archive_minutes:
         payload["auto_archive_duration"] = auto_archive_minutes  # 60, 1440, 4320, 10080
-    r = requests.patch(url, headers=headers, json=payload, timeout=15)
+    r = SESSION.patch(url, headers=headers, json=payload, timeout=15)
     if not r.ok:
         print(f"⚠️ Unarchive failed {r.status_code}: {r.text}")
     return r.ok
@@ -135,10 +175,10 @@ def unarchive_thread(bot_token: str, thread_id: str, *, unlock: bool = True, aut
 def _ensure_bot_in_thread(bot_token: str, thread_id: str) -> bool:
     try:
         h = {"Authorization": f"Bot {bot_token}"}
-        r = requests.get(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me", headers=h, timeout=15)
+        r = SESSION.get(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me", headers=h, timeout=15)
         if r.status_code == 200:
             return True
-        j = requests.put(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me", headers=h, timeout=15)
+        j = SESSION.put(f"https://discord.com/api/v10/channels/{thread_id}/thread-members/@me", headers=h, timeout=15)
         return j.status_code in (200, 204)
     except requests.RequestException:
         return False
@@ -153,7 +193,7 @@ def send_bot_message_embed(bot_token: str, channel_or_thread_id: str, content: s
     }
 
     def _post():
-        return requests.post(url, headers=headers, json=payload, timeout=20)
+        return SESSION.post(url, headers=headers, json=payload, timeout=20)
 
     r = _post()
 
@@ -341,7 +381,22 @@ def build_launch_embed(
     return embed
 
 
-def load_novels_from_mapping():
+class Novel(NamedTuple):
+    """One mapped novel with a free feed, flattened for the launch checker."""
+    host:             str
+    translator:       str
+    host_logo:        str
+    novel_title:      str
+    novel_url:        str
+    featured_image:   str
+    free_feed:        str
+    custom_emoji:     str
+    discord_role_url: str
+    extra_ping_roles: str
+    short_code:       str
+
+
+def load_novels_from_mapping() -> list[Novel]:
     novels = []
     for host_name, host_data in HOSTING_SITE_DATA.items():
         translator   = host_data.get("translator", "")
@@ -351,19 +406,19 @@ def load_novels_from_mapping():
             free_feed_url = details.get("free_feed")
             if not free_feed_url:
                 continue
-            novels.append({
-                "host":             host_name,
-                "translator":       translator,
-                "host_logo":        host_logo,
-                "novel_title":      novel_title,
-                "novel_url":        details.get("novel_url", ""),
-                "featured_image":   details.get("featured_image", ""),
-                "free_feed":        free_feed_url,
-                "custom_emoji":     details.get("custom_emoji", ""),
-                "discord_role_url": details.get("discord_role_url", ""),
-                "extra_ping_roles": details.get("extra_ping_roles", ""),
-                "short_code":       details.get("short_code", ""),
-            })
+            novels.append(Novel(
+                host             = host_name,
+                translator       = translator,
+                host_logo        = host_logo,
+                novel_title      = novel_title,
+                novel_url        = details.get("novel_url", ""),
+                featured_image   = details.get("featured_image", ""),
+                free_feed        = free_feed_url,
+                custom_emoji     = details.get("custom_emoji", ""),
+                discord_role_url = details.get("discord_role_url", ""),
+                extra_ping_roles = details.get("extra_ping_roles", ""),
+                short_code       = details.get("short_code", ""),
+            ))
     return novels
 
 
@@ -383,14 +438,24 @@ def main():
 
     state  = load_state()
     novels = load_novels_from_mapping()
+    state_dirty = False
+
+    # state.json is written once at the end; atexit keeps progress if the run dies mid-loop
+    def flush_state():
+        nonlocal state_dirty
+        if state_dirty:
+            save_state(state)
+            state_dirty = False
+
+    atexit.register(flush_state)
 
     now_local = datetime.now(timezone.utc).astimezone()
 
     for novel in novels:
-        if novel["host"] != "Mistmint Haven":
+        if novel.host != "Mistmint Haven":
             continue
-        novel_title = novel["novel_title"]
-        host_name   = novel["host"]
+        novel_title = novel.novel_title
+        host_name   = novel.host
 
         # only announce for first free
         if state.get(novel_title, {}).get("launch_free"):
@@ -399,7 +464,7 @@ def main():
 
         # route to per-novel thread via secret <SHORTCODE>_THREAD_ID
         # Show the precise expected env var (short_code aware)
-        short_code = (novel.get("short_code") or sanitize_shortcode_from_title(novel_title)).upper()
+        short_code = (novel.short_code or sanitize_shortcode_from_title(novel_title)).upper()
         env_key    = thread_env_key_for(short_code)
         thread_id  = os.getenv(env_key, "").strip()
         if not thread_id:
@@ -408,14 +473,20 @@ def main():
 
         follow_url = build_thread_url(thread_id)
 
-        feed_url = novel.get("free_feed")
+        feed_url = novel.free_feed
         if not feed_url:
             continue
 
         print(f"Fetching free feed for {novel_title} from {feed_url}")
-        resp = requests.get(feed_url, timeout=20)
-        resp.raise_for_status()
-        feed = feedparser.parse(resp.text)
+        # Stream the body straight into feedparser (it sniffs the encoding
+        # itself) instead of materialising resp.text first
+        with SESSION.get(feed_url, timeout=20, stream=True) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True  # undo gzip/deflate transparently
+            feed = feedparser.parse(
+                resp.raw,
+                response_headers={"content-type": resp.headers.get("Content-Type", "")},
+            )
         print(
             f"Parsed {len(feed.entries)} entries "
             f"(Content-Type: {resp.headers.get('Content-Type')})"
@@ -449,11 +520,11 @@ def main():
             )
 
             # we keep build_ping_roles around for parity, but we no longer include it in content
-            # ping_line = build_ping_roles(novel_title, novel.get("extra_ping_roles",""))
+            # ping_line = build_ping_roles(novel_title, novel.extra_ping_roles)
 
             content_msg = build_launch_content(
                 title=novel_title,
-                novel_url=novel.get("novel_url", ""),
+                novel_url=novel.novel_url,
                 chap_name=chap_field,
                 chap_link=chap_link,
                 host=host_name,
@@ -461,13 +532,13 @@ def main():
             )
 
             embed_obj = build_launch_embed(
-                translator=novel.get("translator", ""),
+                translator=novel.translator,
                 title=novel_title,
-                novel_url=novel.get("novel_url", ""),
+                novel_url=novel.novel_url,
                 desc_text=desc_text,
-                cover_url=novel.get("featured_image", ""),
+                cover_url=novel.featured_image,
                 host_name=host_name,
-                host_logo_url=novel.get("host_logo", ""),
+                host_logo_url=novel.host_logo,
                 chap_dt_local=chap_dt_local
             )
 
@@ -489,13 +560,16 @@ def main():
                     "chapter": chap_field,
                     "sent_at": datetime.now().isoformat()
                 }
-                save_state(state)
-                commit_state_update(STATE_PATH)
+                state_dirty = True
             else:
                 print("→ Send failed; not updating state.json")
 
             break
 
+    if state_dirty:
+        flush_state()
+        commit_state_update(STATE_PATH)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,19 @@
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The checkers read their bot token at import time.
+os.environ.setdefault("DISCORD_BOT_TOKEN", "test-token")
+
+# novel_mappings is installed from a separate repo in the workflows; give the
+# checkers an empty mapping when it isn't available locally.
+try:
+    import novel_mappings  # noqa: F401
+except ImportError:
+    stub = types.ModuleType("novel_mappings")
+    stub.HOSTING_SITE_DATA = {}
+    stub.get_nsfw_novels = lambda: []
+    sys.modules["novel_mappings"] = stub
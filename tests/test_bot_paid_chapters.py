@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+pytest.importorskip("discord")
+
+import bot_paid_chapters as paid
+
+
+def _baseline_coin_parts(host_block, novel_title, fallback_price):
+    """get_coin_button_parts as it was before the isdecimal fast path."""
+    label_text, emoji_obj = "", None
+    details = host_block.get("novels", {}).get(novel_title, {})
+    if details.get("coin_price") is not None:
+        label_text = str(details["coin_price"]).strip()
+    emoji_obj = paid.parse_custom_emoji(details.get("coin_emoji") or host_block.get("coin_emoji") or "")
+
+    coin_text = (fallback_price or "").strip()
+    if coin_text:
+        m = re.match(r"^(?P<emoji><a?:[A-Za-z0-9_]+:\d+>)?\s*(?P<num>\d+)?", coin_text)
+        if m:
+            if not emoji_obj:
+                emoji_obj = paid.parse_custom_emoji((m.group("emoji") or "").strip())
+            if not label_text:
+                num = (m.group("num") or "").strip()
+                if num: label_text = num
+
+    if not label_text and not emoji_obj:
+        label_text = "Read here"
+    return label_text, emoji_obj
+
+
+def _parts(label_emoji):
+    label, emoji = label_emoji
+    return label, emoji and (emoji.name, emoji.id, emoji.animated)
+
+
+HOST_BLOCKS = {
+    "unmapped": {},
+    "host emoji": {"coin_emoji": "<:mint:42>"},
+    "mapped novel": {"novels": {"Novel": {"coin_price": 7, "coin_emoji": "<a:gem:9>"}}},
+}
+
+
+@pytest.mark.parametrize("coin", ["5", "<:coin:123> 5", "<a:coin:123>", "<:coin:123>", "", "free"])
+@pytest.mark.parametrize("block", sorted(HOST_BLOCKS))
+def test_coin_button_parts_match_baseline(coin, block):
+    host_block = HOST_BLOCKS[block]
+    assert _parts(paid.get_coin_button_parts(host_block, "Novel", coin)) == \
+        _parts(_baseline_coin_parts(host_block, "Novel", coin))
+
+
+def test_coin_button_parts_values():
+    assert _parts(paid.get_coin_button_parts({}, "Novel", "5")) == ("5", None)
+    assert _parts(paid.get_coin_button_parts({}, "Novel", "<:coin:123> 5")) == ("5", ("coin", 123, False))
+    assert _parts(paid.get_coin_button_parts({}, "Novel", "<a:coin:123>")) == ("", ("coin", 123, True))
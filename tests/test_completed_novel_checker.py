@@ -0,0 +1,218 @@
+import pytest
+
+import completed_novel_checker as cnc
+
+
+def test_feed_cache_survives_same_url_and_marker():
+    state = {}
+    cache = cnc.feed_cache_for(state, "Novel", "paid_feed", "https://feed", "Chapter 120")
+    cache["etag"] = '"abc"'
+
+    again = cnc.feed_cache_for(state, "Novel", "paid_feed", "https://feed", "Chapter 120")
+    assert again["etag"] == '"abc"'
+    assert cnc.conditional_headers(again) == {"If-None-Match": '"abc"'}
+
+
+def test_feed_cache_resets_when_last_chapter_changes():
+    state = {}
+    cache = cnc.feed_cache_for(state, "Novel", "paid_feed", "https://feed", "Chapter 120")
+    cache.update(etag='"abc"', last_modified="Wed, 01 Oct 2025 00:00:00 GMT")
+
+    # mapping now names a later final chapter: validators saved while scanning
+    # for the old marker must not turn the next fetch into a 304
+    cache = cnc.feed_cache_for(state, "Novel", "paid_feed", "https://feed", "Chapter 150")
+    assert cnc.conditional_headers(cache) == {}
+    assert cache == {"url": "https://feed", "marker": "Chapter 150"}
+    assert state["Novel"]["feed_cache"]["paid_feed"] is cache
+
+
+def test_feed_cache_resets_when_url_changes():
+    state = {}
+    cache = cnc.feed_cache_for(state, "Novel", "free_feed", "https://old", "Chapter 120")
+    cache["etag"] = '"abc"'
+
+    cache = cnc.feed_cache_for(state, "Novel", "free_feed", "https://new", "Chapter 120")
+    assert cnc.conditional_headers(cache) == {}
+
+
+def test_save_state_writes_indented_json(tmp_path):
+    path = tmp_path / "state.json"
+    cnc.save_state({"Novel": {"paid_completion": True}}, path=str(path))
+
+    assert path.read_text(encoding="utf-8") == '{\n  "Novel": {\n    "paid_completion": true\n  }\n}'
+    assert cnc.load_state(str(path)) == {"Novel": {"paid_completion": True}}
+
+
+def test_chapter_matches_whole_numbers_only():
+    assert cnc.chapter_matches("Chapter 12 (END)", "Chapter 12")
+    assert cnc.chapter_matches("Chapter 12", "Chapter 12")
+    assert not cnc.chapter_matches("Chapter 120", "Chapter 12")
+    assert not cnc.chapter_matches("Chapter 12", "Chapter 2")
+    assert not cnc.chapter_matches("Chapter 12 (END)", "2 (END)")
+    assert cnc.chapter_matches("Chapter 2 (END)", "2 (END)")
+
+
+class _Resp:
+    def __init__(self, **headers):
+        self.headers = headers
+
+
+def test_send_bucket_waits_out_exhausted_reset(monkeypatch):
+    clock = [100.0]
+    slept = []
+    monkeypatch.setattr(cnc.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(cnc.time, "sleep", slept.append)
+    monkeypatch.setattr(cnc, "_send_not_before", 0.0)
+
+    cnc.note_send_bucket(_Resp(**{"X-RateLimit-Remaining": "2", "X-RateLimit-Reset-After": "3"}))
+    cnc.wait_for_send_bucket()
+    assert slept == []
+
+    cnc.note_send_bucket(_Resp(**{"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "1.5"}))
+    cnc.wait_for_send_bucket()
+    assert slept == [1.5]
+
+
+def test_send_bucket_wait_is_capped(monkeypatch):
+    slept = []
+    monkeypatch.setattr(cnc.time, "monotonic", lambda: 0.0)
+    monkeypatch.setattr(cnc.time, "sleep", slept.append)
+    monkeypatch.setattr(cnc, "_send_not_before", 0.0)
+
+    cnc.note_send_bucket(_Resp(**{"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "600"}))
+    cnc.wait_for_send_bucket()
+    assert slept == [10.0]
+
+
+def test_send_retries_a_429_once(monkeypatch):
+    class _Post(_Resp):
+        def __init__(self, status_code, **headers):
+            super().__init__(**headers)
+            self.status_code = status_code
+            self.ok = status_code < 400
+
+        def raise_for_status(self):
+            raise cnc.requests.HTTPError(response=self)
+
+    posts = []
+
+    def fake_post(url, **kwargs):
+        posts.append(url)
+        return _Post(429, **{"X-RateLimit-Reset-After": "0.2"})
+
+    monkeypatch.setattr(cnc.SESSION, "post", fake_post)
+    monkeypatch.setattr(cnc, "ensure_bot_in_thread", lambda *a: True)
+    monkeypatch.setattr(cnc.time, "sleep", lambda s: None)
+    monkeypatch.setattr(cnc, "_send_not_before", 0.0)
+
+    with pytest.raises(cnc.requests.HTTPError):
+        cnc.send_bot_message("token", "123", "hi")
+    assert len(posts) == 2
+
+
+@pytest.mark.parametrize("module_name", ["completed_novel_checker", "new_novel_checker", "new_extra_checker"])
+def test_sent_hashes_survive_every_state_writer(tmp_path, module_name):
+    import importlib
+
+    writer = importlib.import_module(module_name)
+    path   = str(tmp_path / "state.json")
+    state  = {
+        "Novel": {"paid_completion": {"chapter": "Chapter 120"}},
+        cnc.SENT_HASHES_KEY: {"abcd": "2026-01-01T00:00:00+00:00"},
+    }
+
+    writer.save_state(writer.load_state(path) | state, path=path)
+    reloaded = writer.load_state(path)
+    writer.save_state(reloaded, path=path)
+
+    assert cnc.load_state(path) == state
+
+
+RSS_ITEMS = [
+    ("Chapter 118", "https://example.invalid/118"),
+    ("Chapter 119", "https://example.invalid/119"),
+    ("Chapter 120 (END)", "https://example.invalid/120"),
+    ("Chapter 12", "https://example.invalid/12"),
+]
+
+
+def _rss(items=RSS_ITEMS):
+    body = "".join(
+        f"<item><title>Novel</title><chaptername>{chap}</chaptername><link>{link}</link>"
+        f"<pubDate>Wed, 01 Oct 2025 00:00:00 GMT</pubDate></item>"
+        for chap, link in items
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>t</title>{body}</channel></rss>'
+
+
+def _atom(items=RSS_ITEMS):
+    body = "".join(
+        f'<entry><title>Novel</title><chaptername>{chap}</chaptername><link href="{link}"/>'
+        f"<id>{link}</id><updated>2025-10-01T00:00:00Z</updated></entry>"
+        for chap, link in items
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>t</title>{body}</feed>'
+
+
+def _baseline_hit(body: bytes, marker: str):
+    """What the checker used to do: feedparser, then a plain substring test."""
+    import feedparser
+
+    for entry in feedparser.parse(body).entries:
+        chap = entry.get("chaptername") or entry.get("chapter", "") or ""
+        if marker in chap:
+            return chap, entry.get("link", "")
+    return None
+
+
+def _fast_hit(body: bytes, marker: str):
+    """main()'s path: substring precheck, ElementTree scan, feedparser fallback."""
+    import feedparser
+
+    marker_norm = marker.replace("\u00A0", " ").strip() or marker
+    if not cnc.feed_may_contain(body, marker):
+        return None
+    entries = cnc.scan_rss_items(body, marker_norm)
+    if entries is None:
+        entries = feedparser.parse(body).entries
+    for entry in entries:
+        chap = entry.get("chaptername") or entry.get("chapter", "") or ""
+        if cnc.chapter_matches(chap, marker_norm):
+            return chap, entry.get("link", "")
+    return None
+
+
+@pytest.mark.parametrize("marker", ["Chapter 120", "Chapter 118", "Chapter 119", "Chapter 999"])
+def test_rss_fast_path_matches_baseline(marker):
+    body = _rss().encode("utf-8")
+    assert _fast_hit(body, marker) == _baseline_hit(body, marker)
+
+
+def test_rss_fast_path_skips_longer_chapter_numbers():
+    # the one intended difference: the old substring test took "Chapter 120" for "Chapter 12"
+    body = _rss().encode("utf-8")
+    assert _baseline_hit(body, "Chapter 12")[0] == "Chapter 120 (END)"
+    assert _fast_hit(body, "Chapter 12") == ("Chapter 12", "https://example.invalid/12")
+
+
+def test_rss_scan_finds_marker_in_a_later_item():
+    entries = cnc.scan_rss_items(_rss().encode("utf-8"), "Chapter 120")
+    assert entries == [{
+        "chaptername": "Chapter 120 (END)",
+        "link":        "https://example.invalid/120",
+        "published":   "Wed, 01 Oct 2025 00:00:00 GMT",
+    }]
+
+
+def test_atom_feed_falls_back_to_feedparser():
+    body = _atom().encode("utf-8")
+    assert cnc.scan_rss_items(body, "Chapter 120") is None
+    assert _fast_hit(body, "Chapter 120") == _baseline_hit(body, "Chapter 120") == \
+        ("Chapter 120 (END)", "https://example.invalid/120")
+
+
+def test_utf16_feed_matches_baseline():
+    body = _rss().replace('encoding="UTF-8"', 'encoding="UTF-16"').encode("utf-16")
+    assert cnc.feed_may_contain(body, "Chapter 120")   # ASCII precheck can't judge UTF-16
+    assert _fast_hit(body, "Chapter 120") == _baseline_hit(body, "Chapter 120") == \
+        ("Chapter 120 (END)", "https://example.invalid/120")
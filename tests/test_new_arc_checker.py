@@ -0,0 +1,218 @@
+import feedparser
+import pytest
+
+import new_arc_checker as arc
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Capture Discord posts instead of sending them."""
+    posts = []
+    monkeypatch.setattr(arc, "ensure_bot_in_thread", lambda *a, **k: True)
+    monkeypatch.setattr(
+        arc, "post_message",
+        lambda thread_id, content, embeds=None, suppress_embeds=False: posts.append((content, embeds or [])),
+    )
+    monkeypatch.setattr(arc, "_dirty_histories", set())
+    return posts
+
+
+def _novel(tmp_path):
+    return {
+        "novel_title":  "Long Novel",
+        "host":         "Mistmint Haven",
+        "free_feed":    "https://example.invalid/free",
+        "paid_feed":    "https://example.invalid/paid",
+        "novel_link":   "https://example.invalid/novel",
+        "history_file": str(tmp_path / "long_history.json"),
+    }
+
+
+def _empty_feed():
+    return feedparser.FeedParserDict(status=200, entries=[])
+
+
+def test_long_arc_history_splits_lists_out_of_header(tmp_path, sent):
+    unlocked = [f"【Arc {n}】An Unlocked World With A Fairly Long Descriptive Name {n}" for n in range(1, 46)]
+    locked = [f"【Arc {n}】A Locked World With A Fairly Long Descriptive Name {n}" for n in range(46, 91)]
+    history = {
+        "unlocked": dict.fromkeys(unlocked),
+        "locked": dict.fromkeys(locked),
+        "last_announced": locked[-2],
+    }
+    novel = _novel(tmp_path)
+
+    arc.process_arc(novel, "123", history, _empty_feed(), _empty_feed())
+
+    assert sent, "announcement was not posted"
+    # each list fits a single embed, but not both together
+    for content, embeds in sent:
+        assert all(len(e["description"]) <= 4096 for e in embeds)
+        assert sum(len(e["description"]) for e in embeds) <= arc.EMBED_TOTAL_LIMIT
+    # header first (alone), then one message per list, then the footer
+    assert sent[0][1] == []
+    assert [len(embeds) for _, embeds in sent[1:3]] == [1, 1]
+    assert history["last_announced"] == locked[-1]
+    assert novel["history_file"] in arc._dirty_histories
+
+
+def test_single_list_over_description_limit_is_split(tmp_path, sent):
+    locked = [f"【Arc {n}】A Locked World With A Fairly Long Descriptive Name {n}" for n in range(1, 201)]
+    history = {
+        "unlocked": {},
+        "locked": dict.fromkeys(locked),
+        "last_announced": locked[-2],
+    }
+
+    arc.process_arc(_novel(tmp_path), "123", history, _empty_feed(), _empty_feed())
+
+    list_embeds = [e for _, embeds in sent for e in embeds]
+    assert len(list_embeds) > 1
+    for content, embeds in sent:
+        assert len(embeds) <= arc.EMBED_MAX_PER_MESSAGE
+        assert all(len(e["description"]) <= arc.EMBED_DESCRIPTION_LIMIT for e in embeds)
+        assert sum(len(e["description"]) for e in embeds) <= arc.EMBED_TOTAL_LIMIT
+    # label once, every chunk its own spoiler, no title lost or cut
+    descriptions = [e["description"] for e in list_embeds]
+    assert descriptions[0].startswith(arc.LOCKED_LABEL)
+    assert sum(d.count(arc.LOCKED_LABEL) for d in descriptions) == 1
+    assert all(d.endswith("||") for d in descriptions)
+    joined = "\n".join(descriptions)
+    assert all(arc.format_stored_title(t) in joined for t in locked)
+    assert history["last_announced"] == locked[-1]
+
+
+def test_short_arc_history_keeps_lists_on_header(tmp_path, sent):
+    history = {
+        "unlocked": dict.fromkeys(["【Arc 1】Sea"]),
+        "locked": dict.fromkeys(["【Arc 2】Sky"]),
+        "last_announced": "",
+    }
+
+    novel = _novel(tmp_path)
+
+    arc.process_arc(novel, "123", history, _empty_feed(), _empty_feed())
+
+    assert len(sent) == 2
+    assert len(sent[0][1]) == 2
+    assert history["last_announced"] == "【Arc 2】Sky"
+    # on disk straight away, before the end-of-run commit
+    assert arc.load_history(novel["history_file"])["last_announced"] == "【Arc 2】Sky"
+
+
+def test_new_etag_alone_does_not_dirty_history(tmp_path, sent):
+    history = {
+        "unlocked": dict.fromkeys(["【Arc 1】Sea"]),
+        "locked": {},
+        "last_announced": "",
+        "free_etag": '"old"',
+    }
+    free_feed = feedparser.FeedParserDict(status=200, entries=[], etag='"new"')
+    paid_feed = feedparser.FeedParserDict(status=304, entries=[])
+
+    arc.process_arc(_novel(tmp_path), "123", history, free_feed, paid_feed)
+
+    # validators are kept in memory but never trigger a history commit
+    assert history["free_etag"] == '"new"'
+    assert arc._dirty_histories == set()
+    assert sent == []
+
+
+def test_new_entries_digest_alone_does_not_dirty_history(tmp_path, sent):
+    history = {
+        "unlocked": dict.fromkeys(["【Arc 1】Sea"]),
+        "locked": {},
+        "last_announced": "",
+        "entries_digest": "stale",
+    }
+
+    arc.process_arc(_novel(tmp_path), "123", history, _empty_feed(), _empty_feed())
+
+    assert history["entries_digest"] == arc.entries_digest([], [])
+    assert arc._dirty_histories == set()
+
+
+def test_flush_reports_when_both_pushes_fail(monkeypatch, capsys):
+    calls = []
+
+    def fake_git(*args):
+        calls.append(args)
+        return 1 if args[0] in ("push", "diff") else 0  # diff 1 = staged changes
+
+    monkeypatch.setattr(arc, "_git", fake_git)
+    monkeypatch.setattr(arc, "_dirty_histories", {"a_history.json"})
+
+    arc.flush_histories()
+
+    assert ("push", "origin", "main", "--force") in calls
+    assert "NOT persisted" in capsys.readouterr().err
+    assert arc._dirty_histories == set()
+
+
+def test_session_retry_matches_completed_checker():
+    import completed_novel_checker as cnc
+
+    arc_retry = arc.SESSION.get_adapter("https://").max_retries
+    cnc_retry = cnc.SESSION.get_adapter("https://").max_retries
+    for attr in ("total", "backoff_factor", "backoff_max", "status_forcelist", "respect_retry_after_header"):
+        assert getattr(arc_retry, attr) == getattr(cnc_retry, attr)
+    assert arc_retry.respect_retry_after_header is False
+
+
+def _arc_feed(*extends):
+    """A 200 feed whose entries start arcs (nameextend ends in 001)."""
+    entries = [
+        feedparser.FeedParserDict(title="Long Novel", volume="", chaptername="", nameextend=f"{ext} 001")
+        for ext in extends
+    ]
+    return feedparser.FeedParserDict(status=200, entries=entries)
+
+
+def _arc_history():
+    return {
+        "unlocked": dict.fromkeys(["【Arc 1】Moon World"]),
+        "locked": dict.fromkeys(["【Arc 2】Prologue: Sky World", "【Arc 3】Sea World"]),
+        "last_announced": "【Arc 3】Sea World",
+    }
+
+
+def test_free_arc_unlocks_locked_arc_by_base(tmp_path, sent):
+    history = _arc_history()
+
+    arc.process_arc(_novel(tmp_path), "123", history, _arc_feed("Sea World"), _arc_feed("Sea World"))
+
+    # exact base hit: keeps its number, moves to the end of unlocked
+    assert list(history["unlocked"]) == ["【Arc 1】Moon World", "【Arc 3】Sea World"]
+    assert list(history["locked"]) == ["【Arc 2】Prologue: Sky World"]
+
+
+def test_free_arc_unlocks_locked_arc_by_suffix(tmp_path, sent):
+    history = _arc_history()
+
+    arc.process_arc(_novel(tmp_path), "123", history, _arc_feed("Sky World"), _arc_feed())
+
+    # no exact base, so the suffix scan over locked arcs finds it
+    assert list(history["unlocked"]) == ["【Arc 1】Moon World", "【Arc 2】Prologue: Sky World"]
+    assert list(history["locked"]) == ["【Arc 3】Sea World"]
+
+
+def test_paid_arcs_with_known_bases_are_not_renumbered(tmp_path, sent):
+    history = _arc_history()
+
+    arc.process_arc(_novel(tmp_path), "123", history,
+                    _arc_feed("Moon World"), _arc_feed("Moon World", "Sea World", "Prologue: Sky World"))
+
+    history.pop("entries_digest")
+    assert history == _arc_history()
+    assert arc._dirty_histories == set()
+    assert sent == []
+
+
+def test_new_paid_arc_is_numbered_and_announced(tmp_path, sent):
+    history = _arc_history()
+
+    arc.process_arc(_novel(tmp_path), "123", history, _arc_feed(), _arc_feed("Sea World", "Star World"))
+
+    assert list(history["locked"])[-1] == "【Arc 4】Star World"
+    assert history["last_announced"] == "【Arc 4】Star World"
+    assert "Star World" in sent[0][1][-1]["description"]